@@ -1,47 +1,198 @@
-from flask import Flask, request, jsonify, Response
-from recommenderRender import recommend_assessments  
+from flask import Flask, request, jsonify, Response, g
+from recommenderRender import (recommend_cached, recommend_batch, rank_assessments,
+                               stream_recommendations, embedding_cache, job_page_cache, result_cache)
 import os
 import json
+from singleflight import SingleFlight
+from deadline import Deadline
+from filter_index import filters_key, parse_filters
+from catalog_index import load_catalog
 
 app = Flask(__name__)
 
+MAX_BATCH_SIZE = 100
+# Streamed /recommend formats, chosen with ?stream=<name> or an exact Accept header match
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+# Identical requests that arrive while one is still computing wait for its result instead
+inflight = SingleFlight()
+
+def request_key(job_description, job_url, top_n):
+    """Coalescing key: the job URL if given, else the whitespace-normalized description."""
+    if job_url:
+        return ("url", job_url.strip(), top_n)
+    return ("text", " ".join(job_description.split()), top_n)
+
+def job_fields_valid(job):
+    """True when job_description and job_url are each absent, null or a string."""
+    return all(job.get(field) is None or isinstance(job[field], str) for field in ("job_description", "job_url"))
+
+def format_duration(duration):
+    """Whole minutes from a "<n> minutes" duration string, or 0 when unknown."""
+    if isinstance(duration, str) and "minutes" in duration.lower():
+        return int(duration.split()[0])
+    return 0
+
+def format_recommendation(rec):
+    """Construct a recommendation with explicit key order for the JSON response."""
+    formatted = {
+        "url": rec["url"],  # First field
+        "adaptive_support": rec["adaptive_support"].capitalize(),
+        "description": rec["description"],
+        "duration": format_duration(rec["duration"]),
+        "remote_support": rec["remote_support"].capitalize(),
+        "test_type": [rec["test_type"]] if not isinstance(rec["test_type"], list) else rec["test_type"]
+    }
+    if rec.get("degraded"):
+        formatted["degraded"] = rec["degraded"]
+    return formatted
+
+def stream_format():
+    """Return "ndjson" or "sse" when the client asked for a streamed response, else None."""
+    requested = request.args.get('stream')
+    if requested in STREAM_MIMETYPES:
+        return requested
+    accepted = set(request.accept_mimetypes.values())
+    for name, mimetype in STREAM_MIMETYPES.items():
+        if mimetype in accepted:
+            return name
+    return None
+
+def encode_event(fmt, record):
+    """Serialize one stream record as an NDJSON line or a server-sent event."""
+    data = json.dumps(record, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {record['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+def pin_catalog():
+    """Load the current catalog once for this request, so every stage scores the same version."""
+    g.catalog = load_catalog()
+    return g.catalog
+
+@app.after_request
+def catalog_version_header(response):
+    # Tell clients which catalog version answered, so results can be correlated across reloads
+    catalog = g.get("catalog")
+    if catalog is not None:
+        response.headers["X-Catalog-Version"] = catalog.version["version"]
+    return response
+
+def stream_response(fmt, ranked, deadline, catalog_version):
+    """Stream ranked results first, then duration updates as they resolve, then a summary record."""
+    def generate():
+        for event in stream_recommendations(ranked, deadline=deadline):
+            if event[0] == "result":
+                _, rank, rec = event
+                record = {"type": "result", "rank": rank, "recommendation": format_recommendation(rec)}
+            elif event[0] == "duration":
+                _, rank, url, duration = event
+                record = {"type": "duration", "rank": rank, "url": url, "duration": format_duration(duration)}
+            else:
+                record = {"type": "summary", **event[1], "catalog_version": catalog_version}
+            yield encode_event(fmt, record)
+
+    # Disable proxy buffering so each record reaches the client as soon as it is written
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate(), mimetype=STREAM_MIMETYPES[fmt], headers=headers)
+
+def no_recommendations(deadline):
+    """404 when nothing matched, or 504 when the request's deadline ran out first."""
+    if deadline.expired():
+        return jsonify({"error": "Deadline exceeded before recommendations were ready"}), 504
+    return jsonify({"error": "No recommendations found"}), 404
+
 # Health check route
 @app.route('/', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
+# Cache counters for monitoring
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({"embedding_cache": embedding_cache.stats(), "job_page_cache": job_page_cache.stats(),
+                    "result_cache": result_cache.stats(), "inflight": inflight.stats()}), 200
+
 @app.route('/recommend', methods=['POST'])
 def recommend():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    if not job_fields_valid(data):
+        return jsonify({"error": "job_description and job_url must be strings"}), 400
     job_description = data.get('job_description')
     job_url = data.get('job_url')
     if not job_description and not job_url:
         return jsonify({"error": "Job description or URL is required"}), 400
-    recommendations = recommend_assessments(job_description=job_description, job_url=job_url, top_n=10)
+    try:
+        deadline = Deadline.from_ms(data.get('deadline_ms'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "deadline_ms must be a positive number of milliseconds"}), 400
+    try:
+        filters = parse_filters(data.get('filters'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    catalog = pin_catalog()
+    catalog_version = catalog.version["version"]
+    # Requests only coalesce with others that share the same budget, filters and catalog version
+    key = request_key(job_description, job_url, 10) + (deadline.budget_ms, filters_key(filters), catalog_version)
+    fmt = stream_format()
+    if fmt:
+        ranked = inflight.do(
+            ("rank",) + key,
+            lambda: rank_assessments(job_description=job_description, job_url=job_url, top_n=10,
+                                     deadline=deadline, filters=filters, catalog=catalog)
+        )
+        if not ranked:
+            return no_recommendations(deadline)
+        return stream_response(fmt, ranked, deadline, catalog_version)
+    recommendations, cached = inflight.do(
+        key,
+        lambda: recommend_cached(job_description=job_description, job_url=job_url, top_n=10,
+                                 deadline=deadline, filters=filters, catalog=catalog)
+    )
     if recommendations:
         # Construct each recommendation with explicit key order
-        ordered_recommendations = [
-            {
-                "url": rec["url"],  # First field
-                "adaptive_support": rec["adaptive_support"].capitalize(),
-                "description": rec["description"],
-                "duration": (
-                    int(rec["duration"].split()[0])
-                    if isinstance(rec["duration"], str) and "minutes" in rec["duration"].lower()
-                    else 0
-                ),
-                "remote_support": rec["remote_support"].capitalize(),
-                "test_type": [rec["test_type"]] if not isinstance(rec["test_type"], list) else rec["test_type"]
-            } for rec in recommendations
-        ]
+        ordered_recommendations = [format_recommendation(rec) for rec in recommendations]
         # Construct the final response dictionary
         json_output = {"recommended_assessments": ordered_recommendations}
+        # Partial results list the fields that were served without a fresh lookup
+        degraded = sorted({field for rec in recommendations for field in rec.get("degraded", [])})
+        if degraded:
+            json_output["degraded"] = degraded
+        json_output["catalog_version"] = catalog_version
+        json_output["cached"] = cached
         
         # Manually serialize to JSON to ensure key order is preserved
         json_str = json.dumps(json_output, ensure_ascii=False)
-        return Response(json_str, mimetype='application/json')
-    return jsonify({"error": "No recommendations found"}), 404
+        return Response(json_str, mimetype='application/json', headers={"X-Cache": "HIT" if cached else "MISS"})
+    return no_recommendations(deadline)
+
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch_route():
+    data = request.get_json(silent=True)
+    jobs = data.get('jobs') if isinstance(data, dict) else None
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({"error": "A non-empty list of jobs is required"}), 400
+    if len(jobs) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} jobs are allowed per batch"}), 400
+    if not all(isinstance(job, dict) and (job.get('job_description') or job.get('job_url')) for job in jobs):
+        return jsonify({"error": "Each job needs a job description or URL"}), 400
+    if not all(job_fields_valid(job) for job in jobs):
+        return jsonify({"error": "job_description and job_url must be strings"}), 400
+    catalog = pin_catalog()
+    results = recommend_batch(jobs, top_n=10, catalog=catalog)
+    json_output = {
+        "results": [
+            {"recommended_assessments": [format_recommendation(rec) for rec in recommendations]}
+            for recommendations in results
+        ],
+        "catalog_version": catalog.version["version"]
+    }
+    json_str = json.dumps(json_output, ensure_ascii=False)
+    return Response(json_str, mimetype='application/json')
 
 if __name__ == '__main__':
+    # Development server; in production run: gunicorn -c gunicorn.conf.py api:app
     port = int(os.getenv("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
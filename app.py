@@ -1,5 +1,7 @@
 import streamlit as st
-from recommender import recommend_assessments
+from recommender import recommend_cached
+from catalog_index import load_catalog
+from filter_index import load_filter_index
 import pandas as pd
 import json
 
@@ -14,9 +16,25 @@ if input_type == "Text":
 else:
     job_url = st.sidebar.text_input("Enter Job URL", placeholder="e.g., https://www.indeed.com/viewjob?jk=1234567890")
 
+# Filters: only assessments that pass them are scored
+st.sidebar.subheader("Filters")
+catalog = load_catalog()
+filter_index = load_filter_index(catalog)
+test_types = st.sidebar.multiselect("Test Type", filter_index.values("test_type"))
+remote_choice = st.sidebar.selectbox("Remote Testing Support", ["Any", "Yes", "No"])
+adaptive_choice = st.sidebar.selectbox("Adaptive/IRT Support", ["Any", "Yes", "No"])
+max_duration = st.sidebar.number_input("Max Duration (minutes, 0 = any)", min_value=0, value=0, step=5)
+filters = {
+    "test_type": test_types,
+    "remote_support": None if remote_choice == "Any" else remote_choice == "Yes",
+    "adaptive_support": None if adaptive_choice == "Any" else adaptive_choice == "Yes",
+    "max_duration": max_duration or None,
+}
+
 # Main content area
 st.title("SHL Assessment Recommender")
 st.markdown("Discover tailored SHL assessments based on your job requirements.")
+st.caption(f"Catalog version {catalog.version['version']} ({len(catalog)} assessments)")
 
 # Health Check
 st.sidebar.subheader("System Check")
@@ -27,16 +45,17 @@ if st.sidebar.button("Check API Health"):
 if st.sidebar.button("Generate Recommendations"):
     if input_type == "Text" and job_desc:
         with st.spinner("Generating recommendations..."):
-            recommendations = recommend_assessments(job_description=job_desc, top_n=10)
+            recommendations, cached = recommend_cached(job_description=job_desc, top_n=10, filters=filters,
+                                                       catalog=catalog)
     elif input_type == "URL" and job_url:
         with st.spinner("Scraping job description and generating recommendations..."):
-            recommendations = recommend_assessments(job_url=job_url, top_n=10)
+            recommendations, cached = recommend_cached(job_url=job_url, top_n=10, filters=filters, catalog=catalog)
     else:
         st.error("Please provide a job description or URL.")
         st.stop()
 
     if recommendations:
-        st.success("Recommendations generated!")
+        st.success("Recommendations generated!" + (" (from cache)" if cached else ""))
         # Convert to DataFrame for tabular display, excluding description and adding index starting from 1
         df = pd.DataFrame(recommendations)
         df = df[["name", "url", "duration", "test_type", "remote_support", "adaptive_support"]]
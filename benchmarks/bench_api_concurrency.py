@@ -0,0 +1,150 @@
+"""Throughput of /recommend at 50 concurrent clients: Flask dev server versus gunicorn gthread workers.
+
+Usage: python benchmarks/bench_api_concurrency.py [clients] [requests_per_client] [embed_latency_ms]
+
+Each server runs in a subprocess with the embedding API replaced by a fixed-latency stub and
+duration refreshes and the result cache disabled, so the run needs no network. Two workloads are measured: every
+request carries a distinct job description, and every request carries the same one (where
+in-flight coalescing lets concurrent duplicates share one computation).
+"""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SERVERS = ["flask-dev-single-thread", "flask-dev-threaded", "gunicorn-gthread"]
+
+
+def _patched_app(embed_latency):
+    import pipeline
+    from catalog_index import load_catalog
+    from duration_store import DurationStore
+    from embedding_cache import EmbeddingCache
+    from result_cache import ResultCache
+
+    catalog = load_catalog(os.path.join(ROOT, "shl_assessments.csv"))
+    query = catalog.embeddings[0].tolist()
+
+    class StubEmbedder:
+        name = "stub"
+        remote = True
+
+        def embed(self, text, timeout=None, retry=True):
+            time.sleep(embed_latency)
+            return query
+
+    stub = StubEmbedder()
+    pipeline.catalog_embedder = lambda catalog: stub
+    pipeline.embedding_cache = EmbeddingCache(path=None, max_entries=0)
+    pipeline.duration_store = DurationStore(path=os.devnull, fetcher=None)
+    # Off, so identical requests measure in-flight coalescing rather than finished-result hits
+    pipeline.result_cache = ResultCache(max_entries=0)
+
+    import api
+    return api.app
+
+
+def _serve(mode, port, embed_latency):
+    app = _patched_app(embed_latency)
+    if mode.startswith("flask-dev"):
+        from werkzeug.serving import make_server
+        make_server("127.0.0.1", port, app, threaded=mode == "flask-dev-threaded").serve_forever()
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            config = {}
+            with open(os.path.join(ROOT, "gunicorn.conf.py")) as f:
+                exec(f.read(), config)
+            for key in ("worker_class", "workers", "threads", "keepalive"):
+                self.cfg.set(key, config[key])
+            self.cfg.set("bind", f"127.0.0.1:{port}")
+            self.cfg.set("loglevel", "warning")
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def _load(port, clients, per_client, same_text):
+    url = f"http://127.0.0.1:{port}/recommend"
+    errors = []
+
+    def client(client_id):
+        session = requests.Session()
+        for i in range(per_client):
+            text = "Java developer" if same_text else f"Java developer {client_id}-{i}"
+            response = session.post(url, json={"job_description": text}, timeout=120)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return clients * per_client / elapsed, len(errors)
+
+
+def main(clients, per_client, embed_latency_ms):
+    print(f"{clients} clients x {per_client} requests, embedding latency {embed_latency_ms:.0f} ms")
+    for mode in SERVERS:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve", mode, str(port), str(embed_latency_ms / 1000)],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_for(port)
+            for label, same_text in (("distinct", False), ("identical", True)):
+                before = requests.get(f"http://127.0.0.1:{port}/stats").json()["inflight"]
+                rps, errors = _load(port, clients, per_client, same_text)
+                after = requests.get(f"http://127.0.0.1:{port}/stats").json()["inflight"]
+                # /stats answers from a single worker process, so counts are only shown for one-process servers
+                if mode.startswith("flask-dev"):
+                    counts = (f"{after['executions'] - before['executions']:4d} computed  "
+                              f"{after['coalesced'] - before['coalesced']:4d} coalesced")
+                else:
+                    counts = f"{'-':>4} computed  {'-':>4} coalesced"
+                print(f"  {mode:<24} {label:<9} {rps:8.1f} req/s  {counts}  ({errors} errors)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        _serve(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]))
+    else:
+        args = sys.argv[1:]
+        main(int(args[0]) if args else 50, int(args[1]) if len(args) > 1 else 4,
+             float(args[2]) if len(args) > 2 else 200)
@@ -0,0 +1,136 @@
+"""Browser pool behaviour and overhead, checked with a fake driver instead of Chrome.
+
+Usage: python benchmarks/bench_browser_pool.py [pages] [page_ms]
+
+FakeDriver stands in for a Selenium driver: get() sleeps for page_ms, page_source returns a fixed
+page with the "Assessment length" heading, and it can be told to fail. The run checks the pool's
+contract and stops with an AssertionError if any of it breaks:
+
+- with every browser busy, page_source returns None after checkout_timeout instead of queueing;
+- a browser is quit and replaced after max_uses pages;
+- failure_threshold consecutive failures open the circuit breaker, which skips fetches until
+  the cooldown passes and then lets them through again.
+
+It then reports pages/s with 8 threads against a pool of 2 browsers, and the pool's own cost per
+page (page_ms=0).
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_pool import BrowserPool  # noqa: E402
+
+PAGE = "<html><body><h4>Assessment length</h4><p>Approximate Completion Time in minutes = 30</p></body></html>"
+
+
+class FakeDriver:
+    started = 0
+    quit_count = 0
+
+    def __init__(self, latency=0.0):
+        FakeDriver.started += 1
+        self.latency = latency
+        self.fail = False
+        self.current_url = "about:blank"
+        self.page_source = ""
+
+    def get(self, url):
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("renderer crashed")
+        self.current_url = url
+        self.page_source = PAGE
+
+    def find_element(self, by, value):
+        return object()
+
+    def quit(self):
+        FakeDriver.quit_count += 1
+
+
+def reset():
+    FakeDriver.started = FakeDriver.quit_count = 0
+
+
+def check_saturation():
+    reset()
+    pool = BrowserPool(size=1, checkout_timeout=0.1, driver_factory=lambda: FakeDriver(latency=0.5))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        busy = executor.submit(pool.page_source, "https://example.com/slow")
+        time.sleep(0.05)
+        start = time.perf_counter()
+        skipped = pool.page_source("https://example.com/other")
+        waited = time.perf_counter() - start
+        assert busy.result() == PAGE
+    assert skipped is None, "a saturated pool must skip the fetch"
+    assert waited < 0.4, f"saturated checkout waited {waited:.2f}s, expected about checkout_timeout"
+    assert FakeDriver.started == 1
+    print(f"  saturation: skipped after {waited * 1000:.0f} ms with 1 browser busy")
+
+
+def check_recycling():
+    reset()
+    pool = BrowserPool(size=1, max_uses=3, driver_factory=FakeDriver)
+    for i in range(7):
+        assert pool.page_source(f"https://example.com/{i}") == PAGE
+    assert FakeDriver.started == 3, f"expected 3 browsers for 7 pages at max_uses=3, got {FakeDriver.started}"
+    assert FakeDriver.quit_count == 2
+    pool.close()
+    assert FakeDriver.quit_count == 3
+    print(f"  recycling: 7 pages, max_uses=3 -> {FakeDriver.started} browsers started, all quit on close")
+
+
+def check_breaker():
+    reset()
+    failing = threading.Event()
+    failing.set()
+
+    def factory():
+        driver = FakeDriver()
+        driver.fail = failing.is_set()
+        return driver
+
+    pool = BrowserPool(size=1, failure_threshold=3, cooldown=0.3, driver_factory=factory)
+    for i in range(3):
+        assert pool.page_source(f"https://example.com/{i}") is None
+    assert pool.breaker_open(), "3 consecutive failures must open the breaker"
+    started = FakeDriver.started
+    assert pool.page_source("https://example.com/skipped") is None
+    assert FakeDriver.started == started, "an open breaker must not start browsers"
+    failing.clear()
+    time.sleep(0.35)
+    assert not pool.breaker_open()
+    assert pool.page_source("https://example.com/recovered") == PAGE
+    assert pool._failures == 0, "a success must reset the failure count"
+    print("  circuit breaker: opened after 3 failures, skipped while open, closed after the cooldown")
+
+
+def throughput(pages, latency, threads=8, size=2):
+    reset()
+    pool = BrowserPool(size=size, checkout_timeout=60, driver_factory=lambda: FakeDriver(latency))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(pool.page_source, [f"https://example.com/{i}" for i in range(pages)]))
+    elapsed = time.perf_counter() - start
+    pool.close()
+    assert all(result == PAGE for result in results)
+    return pages / elapsed, elapsed / pages * 1e6
+
+
+def main(pages, page_ms):
+    print("Checks with FakeDriver:")
+    check_saturation()
+    check_recycling()
+    check_breaker()
+    rate, _ = throughput(pages, page_ms / 1000)
+    _, overhead_us = throughput(pages * 20, 0)
+    print(f"{pages} pages of {page_ms:.0f} ms, 8 threads, 2 browsers: {rate:.1f} pages/s "
+          f"(ceiling {2000 / page_ms:.1f})")
+    print(f"pool overhead per page (page_ms=0): {overhead_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, float(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,82 @@
+"""Throughput of the bulk recommendation CLI versus one recommend_assessments call per job.
+
+Usage: python benchmarks/bench_bulk_recommend.py [jobs] [latency_ms] [processes]
+       e.g. python benchmarks/bench_bulk_recommend.py 20000 100 1,4
+
+A local stub stands in for the Gemini embedding API and answers every call after a fixed
+latency (default 100 ms), so the run needs no API key. Jobs are synthetic requisitions of
+300-1,500 characters written to a temporary JSONL file. The per-job baseline is timed on a
+sample of them with the embedding cache and duration refreshes off, as a fresh historical job
+would see them. bulk_recommend then ranks the whole file with each process count.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stub_gemini import start_stub  # noqa: E402
+
+BASELINE_JOBS = 50
+LATENCY = 0.1
+WORDS = ("java python sql excel sales manager customer service analyst developer stakeholders leadership "
+         "communication accounting finance data cloud testing support operations marketing .NET C# "
+         "numerical reasoning personality team graduate engineer administrative banking").split()
+
+
+def write_jobs(path, n_jobs, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n_jobs):
+            words = rng.choices(WORDS, k=rng.randint(40, 200))
+            f.write(json.dumps({"id": f"req-{i}", "job_description": " ".join(words)}) + "\n")
+
+
+def main(n_jobs, process_counts):
+    server, api_base = start_stub(LATENCY)
+    # Set before any project import, so the embedder of every worker process talks to the stub
+    os.environ["GEMINI_API_BASE"] = api_base
+    os.environ["GEMINI_EMBED_RPM"] = "1000000"
+
+    import pipeline
+    from bulk_recommend import bulk_recommend
+    from duration_store import DurationStore
+    from embedding_cache import EmbeddingCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs_path = os.path.join(tmp, "jobs.jsonl")
+        write_jobs(jobs_path, n_jobs)
+
+        pipeline.embedding_cache = EmbeddingCache(path=None, max_entries=0)
+        pipeline.duration_store = DurationStore(path=os.devnull, fetcher=None)
+        with open(jobs_path, encoding="utf-8") as f:
+            sample = [json.loads(next(f))["job_description"] for _ in range(min(BASELINE_JOBS, n_jobs))]
+        start = time.perf_counter()
+        for description in sample:
+            pipeline.recommend_assessments(job_description=description)
+        baseline = len(sample) / (time.perf_counter() - start)
+
+        results = []
+        for processes in process_counts:
+            output_path = os.path.join(tmp, f"ranked-{processes}.jsonl")
+            start = time.perf_counter()
+            ranked, _ = bulk_recommend(jobs_path, output_path, os.path.join(ROOT, "shl_assessments.csv"),
+                                       processes=processes)
+            results.append((processes, ranked / (time.perf_counter() - start)))
+
+    server.shutdown()
+    print(f"\n{n_jobs:,} jobs, stub embedding latency {LATENCY * 1000:.0f} ms, {os.cpu_count()} CPUs")
+    print(f"  recommend_assessments per job       {baseline:9.1f} jobs/s  ({len(sample)}-job sample)")
+    for processes, throughput in results:
+        print(f"  bulk_recommend, {processes} process(es)       {throughput:9.1f} jobs/s  "
+              f"({throughput / baseline:.0f}x)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) > 1:
+        LATENCY = float(args[1]) / 1000
+    main(int(args[0]) if args else 20_000, [int(p) for p in args[2].split(",")] if len(args) > 2 else [1, 4])
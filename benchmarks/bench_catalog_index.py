@@ -0,0 +1,90 @@
+"""Compare the legacy per-request CSV parse against the precompiled catalog index.
+
+Usage: python benchmarks/bench_catalog_index.py [dataset_path]
+
+Each path is measured in a fresh subprocess so that load time and peak RSS are not
+polluted by the other path's allocations.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REQUESTS = 50
+
+
+def _csv_path(dataset_path):
+    import numpy as np
+    import pandas as pd
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    def one_request(query):
+        df = pd.read_csv(dataset_path)
+        df = df.drop_duplicates(subset=["name", "url"], keep="first")
+        embeddings = [json.loads(e) for e in df["embedding"]]
+        similarities = cosine_similarity(np.array([query]), np.array(embeddings))[0]
+        return np.argsort(similarities)[-10:][::-1]
+
+    return one_request
+
+
+def _index_path(dataset_path):
+    from catalog_index import load_catalog
+    from scoring import search
+
+    def one_request(query):
+        catalog = load_catalog(dataset_path)
+        return search(catalog.embeddings, query, 10)[0]
+
+    return one_request
+
+
+def _run_child(mode, dataset_path):
+    import resource
+    import numpy as np
+
+    one_request = _csv_path(dataset_path) if mode == "csv" else _index_path(dataset_path)
+    query = np.random.default_rng(0).standard_normal(768).tolist()
+
+    start = time.perf_counter()
+    one_request(query)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        one_request(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    print(json.dumps({
+        "mode": mode,
+        "first_request_ms": round(first_ms, 2),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main(dataset_path):
+    from catalog_index import build_index
+
+    # Build up front so the index path measures a warm on-disk index, as in production
+    build_index(dataset_path)
+    for mode in ("csv", "index"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, dataset_path],
+            capture_output=True, text=True, check=True, cwd=ROOT,
+        )
+        print(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _run_child(sys.argv[2], sys.argv[3])
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "shl_assessments.csv"))
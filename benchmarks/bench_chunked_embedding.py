@@ -0,0 +1,95 @@
+"""Embedding latency and scoring cost of chunked (multi-vector) job descriptions versus one vector.
+
+Usage: python benchmarks/bench_chunked_embedding.py [sizes] [latency_ms]
+       e.g. python benchmarks/bench_chunked_embedding.py 10000,100000,300000 150
+
+Embedding: a local stub stands in for the Gemini API and answers after a fixed latency, so the
+run needs no API key. A long posting is embedded as one vector (embedContent) and as chunks (one
+batchEmbedContents call), with the embedding cache turned off.
+
+Scoring: exact search of one query vector against synthetic unit-norm catalogs of 768 dims,
+versus search_chunks over the chunks x catalog similarity matrix with max-sim and weighted-mean
+aggregation, for 4, 8 and 16 chunks.
+"""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stub_gemini import DIM, start_stub  # noqa: E402
+
+CHUNK_COUNTS = [4, 8, 16]
+REPEATS = 20
+LATENCY = 0.15
+
+def embedding_latency():
+    server, api_base = start_stub(LATENCY)
+    os.environ["GEMINI_API_BASE"] = api_base
+    os.environ["EMBEDDING_CHUNKING"] = "max"
+    import pipeline
+    from chunking import CHUNKED_DESCRIPTION_MAX_CHARS, split_text
+    from embedder import get_embedder
+    from embedding_cache import EmbeddingCache
+
+    pipeline.embedding_cache = EmbeddingCache(path=None, max_entries=0)
+    sentence = "Responsibilities include owning services end to end and mentoring engineers on the team. "
+    posting = (sentence * (CHUNKED_DESCRIPTION_MAX_CHARS // len(sentence)))[:CHUNKED_DESCRIPTION_MAX_CHARS]
+    chunks = split_text(posting)
+    embedder = get_embedder("gemini")
+    pipeline.get_embedding(posting, embedder)  # Warm the keep-alive connection
+
+    single, chunked = [], []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        pipeline.get_embedding(posting, embedder)
+        single.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        pipeline.embed_job_descriptions([posting], embedder)
+        chunked.append((time.perf_counter() - start) * 1000)
+    server.shutdown()
+    print(f"Embedding a {len(posting):,}-character posting, stub latency {LATENCY * 1000:.0f} ms:")
+    print(f"  single vector (embedContent)          {statistics.median(single):7.1f} ms")
+    print(f"  {len(chunks)} chunks (one batchEmbedContents)     {statistics.median(chunked):7.1f} ms")
+
+
+def scoring_cost(sizes):
+    from scoring import normalize_rows
+    from vector_index import ExactIndex, search_chunks
+
+    rng = np.random.default_rng(0)
+    print(f"\nScoring cost, exact backend, {DIM} dims, median of {REPEATS} runs (ms):")
+    print(f"{'catalog':>9}  {'1 vector':>9}  " + "  ".join(f"{f'{c} max':>8} {f'{c} mean':>8}" for c in CHUNK_COUNTS))
+    for n_rows in sizes:
+        matrix = normalize_rows(rng.standard_normal((n_rows, DIM), dtype=np.float32))
+        index = ExactIndex(matrix)
+        query = rng.standard_normal(DIM, dtype=np.float32)
+        cells = [_median_ms(lambda: index.search(query, 10))]
+        for n_chunks in CHUNK_COUNTS:
+            chunks = rng.standard_normal((n_chunks, DIM), dtype=np.float32)
+            weights = np.full(n_chunks, 1 / n_chunks)
+            for aggregate in ("max", "mean"):
+                cells.append(_median_ms(lambda: search_chunks(index, matrix, chunks, 10, aggregate=aggregate,
+                                                              weights=weights)))
+        print(f"{n_rows:>9,}  {cells[0]:9.2f}  " + "  ".join(f"{m:8.2f} {w:8.2f}" for m, w in zip(cells[1::2], cells[2::2])))
+        del matrix, index
+
+
+def _median_ms(fn):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) > 1:
+        LATENCY = float(args[1]) / 1000
+    embedding_latency()
+    scoring_cost([int(s) for s in args[0].split(",")] if args else [1_000, 10_000, 100_000, 300_000])
@@ -0,0 +1,93 @@
+"""Crawler classification: one generateContent call per description versus cached, batched requests.
+
+Usage: python benchmarks/bench_crawler_classification.py [items] [latency_ms]
+
+A local stub stands in for the Gemini API and answers after a fixed latency, so the run needs no
+API key and spends no quota. The text quota is lifted so only request count and latency matter.
+Three passes classify the same descriptions: one per request with no cache (the old crawler),
+batched into a fresh cache, and again from the now warm cache, as a second crawl would.
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import crawler  # noqa: E402
+from classification_cache import ClassificationCache  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+
+LATENCY = 0.5
+calls = {"generateContent": 0}
+
+
+class StubGemini(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(LATENCY)
+        calls["generateContent"] += 1
+        prompt = body["contents"][0]["parts"][0]["text"]
+        ids = [int(i) for i in re.findall(r"^\s*(\d+)\. ", prompt, re.MULTILINE)]
+        answer = [{"id": i, "test_type": "Knowledge & Skills", "adaptive_support": "no", "remote_support": "yes"}
+                  for i in ids]
+        data = json.dumps({"candidates": [{"content": {"parts": [{"text": json.dumps(answer)}]}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(assessments, batch_size, workers):
+    crawler.CLASSIFY_BATCH_SIZE = batch_size
+    calls["generateContent"] = 0
+    for assessment in assessments:
+        assessment.update({"test_type": "N/A", "adaptive_support": "N/A", "remote_support": "N/A"})
+    chunks = [assessments[i:i + batch_size] for i in range(0, len(assessments), batch_size)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(crawler.classify_assessments, chunks))
+    elapsed = time.perf_counter() - start
+    assert all(assessment["test_type"] == "Knowledge & Skills" for assessment in assessments)
+    return elapsed, calls["generateContent"]
+
+
+def main(items, latency_ms):
+    global LATENCY
+    LATENCY = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    crawler.GEMINI_API_BASE = f"http://127.0.0.1:{server.server_port}/v1beta"
+    crawler.text_limiter = TokenBucket.per_minute(1_000_000, capacity=1000)
+    assessments = [{"description": f"Assessment description number {i}"} for i in range(items)]
+    batch_size = crawler.CLASSIFY_BATCH_SIZE
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            crawler.classification_cache = ClassificationCache(path=None)
+            legacy = run(assessments, 1, crawler.CLASSIFY_WORKERS)
+            crawler.classification_cache = ClassificationCache(path=os.path.join(tmp, "classification.sqlite3"))
+            cold = run(assessments, batch_size, crawler.CLASSIFY_WORKERS)
+            warm = run(assessments, batch_size, crawler.CLASSIFY_WORKERS)
+    finally:
+        server.shutdown()
+
+    print(f"{items} descriptions, stub latency {latency_ms:.0f} ms, {crawler.CLASSIFY_WORKERS} requests in flight")
+    print(f"  one per request:           {legacy[0]:6.2f}s ({legacy[1]} requests)")
+    print(f"  batched ({batch_size}), cold cache:  {cold[0]:6.2f}s ({cold[1]} requests)")
+    print(f"  batched ({batch_size}), warm cache:  {warm[0]:6.2f}s ({warm[1]} requests)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, float(sys.argv[2]) if len(sys.argv) > 2 else 500)
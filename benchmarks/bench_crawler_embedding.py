@@ -0,0 +1,51 @@
+"""Full-catalog embed time: legacy per-description embedContent calls versus the batched embed_many
+call made by the crawler's embed stage.
+
+Usage: python benchmarks/bench_crawler_embedding.py [items] [latency_ms]
+
+A local stub stands in for the Gemini API and answers after a fixed latency, so the run needs no
+API key and spends no quota. The legacy path replays the old crawler: 5 worker threads, one
+embedContent call per description, each followed by time.sleep(0.1).
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import crawler  # noqa: E402
+import http_client  # noqa: E402
+from stub_gemini import calls, start_stub  # noqa: E402
+
+
+def legacy_embed(text):
+    url = f"{crawler.embedder.api_base}/models/{crawler.embedder.model}:embedContent?key=stub"
+    data = {"model": f"models/{crawler.embedder.model}", "content": {"parts": [{"text": text}]}}
+    response = http_client.post(url, json=data)
+    response.raise_for_status()
+    time.sleep(0.1)
+    return response.json()["embedding"]["values"]
+
+
+def main(items, latency_ms):
+    server, crawler.embedder.api_base = start_stub(latency_ms / 1000)
+    texts = [f"Assessment description number {i}" for i in range(items)]
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            list(executor.map(legacy_embed, texts))
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        crawler.embedder.embed_many(texts)
+        batched_s = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    print(f"legacy per-item: {legacy_s:.2f}s ({calls['embedContent']} requests)")
+    print(f"embed_many:      {batched_s:.2f}s ({calls['batchEmbedContents']} requests)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, float(sys.argv[2]) if len(sys.argv) > 2 else 50)
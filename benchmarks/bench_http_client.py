@@ -0,0 +1,58 @@
+"""Per-call latency of bare requests.get versus the pooled http_client session.
+
+Usage: python benchmarks/bench_http_client.py [calls]
+
+Runs against a local keep-alive HTTP server, so the numbers show connection setup cost only;
+against remote TLS endpoints the saving per call is larger.
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client  # noqa: E402
+
+BODY = b"<html><body><h4>Assessment length</h4><p>Approximate Completion Time in minutes = 30</p></body></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Avoid delayed-ACK stalls on keep-alive connections
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _time_calls(fetch, url, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fetch(url).raise_for_status()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main(calls):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    try:
+        bare_ms = _time_calls(lambda u: requests.get(u, timeout=10), url, calls)
+        pooled_ms = _time_calls(http_client.get, url, calls)
+    finally:
+        server.shutdown()
+    print(f"bare requests.get:  {bare_ms:.3f} ms/call")
+    print(f"pooled http_client: {pooled_ms:.3f} ms/call ({bare_ms / pooled_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
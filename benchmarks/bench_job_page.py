@@ -0,0 +1,173 @@
+"""Extraction time and peak memory of the streaming job-page extractor versus the BeautifulSoup version.
+
+Usage: python benchmarks/bench_job_page.py [corpus_dir] [repeats]
+
+corpus_dir holds saved job pages (*.html, e.g. "Save page as" from a browser or curl -o). Without
+it, a synthetic corpus is generated that mimics the shapes seen on job boards: a typical ATS
+posting, pages without usable <p> tags (the <div>/<section> fallback, one behind thousands of
+nested menu wrappers), a single-page-app shell with thousands of nested wrappers and megabytes
+of inline state, and a multi-megabyte listing.
+
+Each page is read the way scrape_job_description reads it: the old path loads the whole body and
+parses it with html.parser; the new path streams 64 KB chunks, capped at JOB_PAGE_MAX_BYTES, into
+the lxml extractor. Peak memory is the max RSS growth of a fresh subprocess per page and extractor,
+because lxml allocates outside the Python heap. Linux only, since it reads /proc/self/status.
+"""
+import glob
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EXTRACTORS = ["bs4-html.parser", "lxml-stream"]
+SENTENCES = [
+    "You will own the design and delivery of services used by millions of customers every day",
+    "Key responsibilities include code reviews, mentoring engineers and improving reliability",
+    "Qualifications: five or more years of experience with Python, SQL and cloud platforms",
+    "Strong communication skills and a track record of cross-team collaboration are required",
+    "The role reports to the engineering manager and works closely with product and design",
+]
+BOILERPLATE = "We use cookies to improve your experience. Read our privacy policy and cookie policy. Apply now!"
+
+
+def legacy_extract(content):
+    """The extractor scrape_job_description used before the streaming one, on a fully read body."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, "html.parser")
+    job_keywords = [
+        "responsibilities", "duties", "qualifications", "requirements",
+        "skills", "experience", "role", "position", "overview", "description"
+    ]
+    description_parts = []
+    for p in soup.find_all("p"):
+        text = p.get_text(strip=True)
+        if len(text) < 50 or any(phrase in text.lower() for phrase in ["apply now", "privacy policy", "equal opportunity", "cookie policy"]):
+            continue
+        if len(text) > 100 or any(keyword in text.lower() for keyword in job_keywords):
+            description_parts.append(text)
+    if not description_parts or sum(len(part) for part in description_parts) < 200:
+        for tag in soup.find_all(["div", "section"]):
+            text = tag.get_text(strip=True)
+            if len(text) > 200 and any(keyword in text.lower() for keyword in job_keywords):
+                sentences = re.split(r'[.!?]+', text)
+                sentences = [s.strip() for s in sentences if len(s.strip()) > 50]
+                description_parts.extend(sentences)
+                break
+    if not description_parts:
+        return None
+    return re.sub(r'\s+', ' ', " ".join(description_parts)).strip()[:5000]
+
+
+def stream_extract(path):
+    from job_page import CHUNK_BYTES, JOB_PAGE_MAX_BYTES, extract_job_description
+
+    def chunks():
+        remaining = JOB_PAGE_MAX_BYTES
+        with open(path, "rb") as f:
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_BYTES, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    return extract_job_description(chunks())
+
+
+def run(extractor, path):
+    if extractor == "lxml-stream":
+        return stream_extract(path)
+    with open(path, "rb") as f:
+        return legacy_extract(f.read())
+
+
+def _paragraphs(n, offset=0):
+    return "".join(f"<p>{SENTENCES[(i + offset) % len(SENTENCES)]}. {SENTENCES[(i + offset + 1) % len(SENTENCES)]}.</p>\n"
+                   for i in range(n))
+
+
+def synthetic_corpus(directory):
+    nav = "".join(f'<li><a href="/jobs/{i}">Opening {i}</a></li>' for i in range(300))
+    pages = {
+        "ats_posting.html": (
+            f"<html><head><title>Engineer</title><style>{'.c{color:red}' * 2000}</style></head><body>"
+            f"<nav><ul>{nav}</ul></nav><main><section><h1>Software Engineer</h1>{_paragraphs(12)}</section>"
+            f"<footer><p>{BOILERPLATE}</p></footer></main></body></html>"),
+        "no_paragraphs.html": (
+            "<html><body>" + "<div class='wrap'>" * 40 + "<span>Overview</span>"
+            + "".join(f"<div><span>{s}.</span></div>" for s in SENTENCES * 6)
+            + "</div>" * 40 + "</body></html>"),
+        "deep_fallback.html": (
+            # Keyword-free nested menus before the posting: every nested <div> fails the fallback test
+            "<html><body>" + "<div><span>Home | Careers | Locations | Teams | Students</span>" * 3000
+            + "</div>" * 3000 + "<section>" + "".join(f"<span>{s}.</span>" for s in SENTENCES * 6)
+            + "</section></body></html>"),
+        "spa_deeply_nested.html": (
+            "<html><head><script src='/app.js'></script></head><body>" + "<div class='layout'>" * 3000
+            + _paragraphs(40) + "</div>" * 3000
+            + "<script id='__NEXT_DATA__'>{\"jobs\":[" + '{"x":1},' * 400_000 + "]}</script></body></html>"),
+        "large_listing.html": (
+            "<html><body><main>"
+            + "".join(f"<article><div><h2>Job {i}</h2>{_paragraphs(3, i)}</div></article>" for i in range(20_000))
+            + "</main></body></html>"),
+    }
+    for name, html in pages.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(html)
+    return sorted(os.path.join(directory, name) for name in pages)
+
+
+def _rss_kb():
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, kb, _ = line.split()
+                values[name.rstrip(":")] = int(kb)
+    return values
+
+
+def _worker(extractor, path, repeats):
+    import bs4  # noqa: F401  Imported up front so both extractors start from the same baseline
+    import job_page  # noqa: F401
+
+    before = _rss_kb()["VmRSS"]
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        description = run(extractor, path)
+        times.append((time.perf_counter() - start) * 1000)
+    peak = _rss_kb()["VmHWM"] - before
+    print(statistics.median(times), peak, len(description or ""))
+
+
+def main(corpus_dir, repeats):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = sorted(glob.glob(os.path.join(corpus_dir, "*.htm*"))) if corpus_dir else synthetic_corpus(directory)
+        if not paths:
+            sys.exit(f"No *.html pages in {corpus_dir}")
+        print(f"{'page':<26} {'size':>9}  {'extractor':<16} {'ms':>9} {'peak RSS':>10} {'chars':>6}  same")
+        for path in paths:
+            outputs = {extractor: run(extractor, path) for extractor in EXTRACTORS}
+            same = "yes" if outputs["bs4-html.parser"] == outputs["lxml-stream"] else "no"
+            for extractor in EXTRACTORS:
+                output = subprocess.run([sys.executable, __file__, "--worker", extractor, path, str(repeats)],
+                                        capture_output=True, text=True, check=True).stdout
+                ms, peak_kb, chars = output.split()[-3:]
+                label = os.path.basename(path) if extractor == EXTRACTORS[0] else ""
+                size = f"{os.path.getsize(path) / 2 ** 20:.2f} MB" if label else ""
+                print(f"{label:<26} {size:>9}  {extractor:<16} {float(ms):9.1f} {int(peak_kb) / 1024:7.1f} MB "
+                      f"{chars:>6}  {same if label else ''}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else None, int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,78 @@
+"""Build time, size and query latency of the BM25 lexical index, on the real catalog and at scale.
+
+Usage: python benchmarks/bench_lexical_index.py [sizes] [repeats]
+       e.g. python benchmarks/bench_lexical_index.py 10000,100000 200
+
+The real catalog is shl_assessments.csv. Larger synthetic catalogs are sampled from its vocabulary:
+each row's name and description are random draws of the catalog's words, with the same lengths
+as a random real row, so the term statistics resemble the real ones. Queries are a short skill
+query ("Java 8 developer with SQL") and a 5,000-character job description (the extraction cap).
+
+Build time is paid once per catalog version, when catalog_index.py compiles it; serving processes
+memory-map the result.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEATS = 200
+SHORT_QUERY = "Java 8 developer with SQL"
+SENTENCE = ("We are hiring a backend engineer to build Java and .NET services, write SQL, automate reports "
+            "in Excel, and work with stakeholders across sales, finance and customer service teams. ")
+
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def synthetic_metadata(metadata, n_rows, seed=0):
+    rng = random.Random(seed)
+    words = [w for row in metadata for w in f"{row['name']} {row['description'] or ''}".split()]
+    rows = []
+    for _ in range(n_rows):
+        template = rng.choice(metadata)
+        name_words = len(template["name"].split())
+        description_words = len((template["description"] or "").split())
+        rows.append({"name": " ".join(rng.choices(words, k=name_words)),
+                     "description": " ".join(rng.choices(words, k=description_words))})
+    return rows
+
+
+def report(label, metadata, repeats):
+    from lexical_index import LexicalIndex
+
+    start = time.perf_counter()
+    index = LexicalIndex.build(metadata)
+    build_s = time.perf_counter() - start
+    size_mb = sum(a.nbytes for a in (index.term_keys, index.offsets, index.docs, index.weights)) / 2**20
+    long_query = (SENTENCE * (5000 // len(SENTENCE) + 1))[:5000]
+    short_ms = _median_ms(lambda: index.search(SHORT_QUERY, 10), repeats)
+    long_ms = _median_ms(lambda: index.search(long_query, 10), repeats)
+    print(f"{label:>14}  {len(metadata):>8,}  {build_s:8.2f}  {len(index.term_keys):>10,}  {size_mb:8.1f}  "
+          f"{short_ms:9.3f}  {long_ms:9.3f}")
+
+
+def main(sizes, repeats):
+    from catalog_index import load_catalog
+
+    catalog = load_catalog(os.path.join(ROOT, "shl_assessments.csv"))
+    print(f"Median of {repeats} queries (top 10)")
+    print(f"{'catalog':>14}  {'rows':>8}  {'build s':>8}  {'terms':>10}  {'MB':>8}  {'short ms':>9}  {'5k ms':>9}")
+    report("shl_assessments", catalog.metadata, repeats)
+    for n_rows in sizes:
+        report("synthetic", synthetic_metadata(catalog.metadata, n_rows), repeats)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main([int(s) for s in args[0].split(",")] if args else [10_000, 100_000], int(args[1]) if len(args) > 1 else REPEATS)
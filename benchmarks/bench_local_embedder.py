@@ -0,0 +1,66 @@
+"""Query embedding latency of the local hashing embedder and end-to-end ranking on a CPU-only catalog.
+
+Usage: python benchmarks/bench_local_embedder.py [dataset_path] [repeats]
+
+The catalog CSV (default shl_assessments.csv) is re-embedded with the hashing embedder into a
+temporary directory, as python embedder.py --embedder hashing would, and served from there, so
+no API key or network is needed. Reported: embedding latency for short, typical and maximum-length
+job descriptions, rank_assessments latency (embedding plus exact search), and how often a catalog
+description used as the query ranks its own row first.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEATS = 200
+SENTENCE = "We are hiring a Java developer to build backend services, work with stakeholders and mentor juniors. "
+
+
+def _percentiles_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main(dataset_path, repeats):
+    import pipeline
+    from catalog_index import load_catalog
+    from embedder import get_embedder, reembed_dataset
+
+    embedder = get_embedder("hashing")
+    print(f"Query embedding with {embedder.name}, {repeats} runs:")
+    for chars in (200, 1_000, 5_000):
+        text = (SENTENCE * (chars // len(SENTENCE) + 1))[:chars]
+        median, p95 = _percentiles_ms(lambda: embedder.embed(text), repeats)
+        print(f"  {chars:>6,} chars   median {median:6.2f} ms   p95 {p95:6.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local_path = os.path.join(tmp, "catalog_hashing.csv")
+        reembed_dataset(dataset_path, embedder.name, local_path)
+        catalog = load_catalog(local_path)
+        text = (SENTENCE * 10)[:1_000]
+        median, p95 = _percentiles_ms(
+            lambda: pipeline.rank_assessments(job_description=text, catalog=catalog), repeats)
+        print(f"rank_assessments on {len(catalog)} rows ({catalog.embedder}): "
+              f"median {median:.2f} ms, p95 {p95:.2f} ms")
+
+        hits = 0
+        for idx in range(len(catalog)):
+            ranked = pipeline.rank_assessments(job_description=catalog.metadata[idx]["description"],
+                                                        top_n=1, catalog=catalog)
+            hits += bool(ranked) and ranked[0][0]["url"] == catalog.metadata[idx]["url"]
+        print(f"Own row ranked first for {hits}/{len(catalog)} catalog descriptions used as queries")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args[0] if args else os.path.join(ROOT, "shl_assessments.csv"), int(args[1]) if len(args) > 1 else REPEATS)
@@ -0,0 +1,145 @@
+"""Memory, disk size and ranking agreement of the int8 backend versus the float32 and legacy float64 paths.
+
+Usage: python benchmarks/bench_quantized_index.py [dataset_path] [synthetic_rows]
+
+Agreement is measured on the real catalog: queries are catalog rows plus noise, and the reference
+ranking is the legacy path (JSON embeddings parsed into float64, cosine similarity). Matches are
+tie-aware because the catalog contains rows with identical embeddings: a result counts when its
+float64 score equals the reference score at that rank.
+
+Memory per worker comes from a fresh subprocess that opens a synthetic catalog of synthetic_rows x
+768 and answers 20 queries with each backend (the real catalog is too small to show a difference),
+timing each query after a warm-up query.
+Private memory is paid by every worker. File-backed pages of the memory-mapped index sit in the
+shared page cache and are paid once per host. Linux only, since it reads /proc/self/status.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+K = 10
+QUERIES = 200
+DIM = 768
+BACKENDS = ["float64-legacy", "float32-exact", "int8-rerank"]
+
+
+def _mb(n_bytes):
+    return n_bytes / 2 ** 20
+
+
+def agreement(dataset_path):
+    import pandas as pd
+
+    from catalog_index import EMBEDDINGS_FILE, QUANTIZED_FILE, SCALES_FILE, load_catalog
+    from scoring import normalize_rows
+    from vector_index import ExactIndex, QuantizedIndex
+
+    catalog = load_catalog(dataset_path)
+    df = pd.read_csv(dataset_path)
+    csv_bytes = int(df["embedding"].astype(str).str.len().sum())
+    files = {name: os.path.getsize(os.path.join(catalog.index_dir, name))
+             for name in (EMBEDDINGS_FILE, QUANTIZED_FILE, SCALES_FILE)}
+    print(f"On disk for {len(catalog)} rows:")
+    print(f"  CSV embedding column (JSON text)  {_mb(csv_bytes):8.2f} MB")
+    print(f"  {EMBEDDINGS_FILE:<33} {_mb(files[EMBEDDINGS_FILE]):8.2f} MB")
+    print(f"  {QUANTIZED_FILE + ' + ' + SCALES_FILE:<33} {_mb(files[QUANTIZED_FILE] + files[SCALES_FILE]):8.2f} MB")
+
+    legacy = np.array([json.loads(row["embedding_json"]) for row in _embedding_rows(df, catalog)])
+    legacy_unit = legacy / np.linalg.norm(legacy, axis=1, keepdims=True)
+    rng = np.random.default_rng(0)
+    queries = legacy[rng.integers(len(legacy), size=QUERIES)]
+    queries = queries + rng.standard_normal(queries.shape) * 0.5 * np.abs(queries).mean()
+    legacy_scores = queries @ legacy_unit.T / np.linalg.norm(queries, axis=1, keepdims=True)
+    reference = np.sort(legacy_scores, axis=1)[:, ::-1][:, :K]
+
+    candidates = {
+        "float32 exact": ExactIndex(catalog.embeddings),
+        "int8, no re-rank": QuantizedIndex(catalog.quantized, catalog.scales, catalog.embeddings, rerank=K),
+        "int8 + float32 re-rank": QuantizedIndex(catalog.quantized, catalog.scales, catalog.embeddings),
+    }
+    print(f"\nTop-{K} agreement with the float64 path over {QUERIES} noisy queries:")
+    print(f"  {'backend':<24} {'overlap':>8} {'same order':>11}")
+    for label, index in candidates.items():
+        found, _ = index.search(normalize_rows(queries), K)
+        found_scores = np.take_along_axis(legacy_scores, found, axis=1)
+        overlap = np.mean(found_scores >= reference[:, -1:] - 1e-9)
+        same = np.mean(np.all(np.abs(found_scores - reference) < 1e-9, axis=1))
+        print(f"  {label:<24} {overlap:8.3f} {same:11.3f}")
+
+
+def _embedding_rows(df, catalog):
+    # Replay the CSV rows in catalog order so row positions line up with the index
+    by_url = {}
+    for row in df.drop_duplicates(subset=["name", "url"], keep="first").itertuples(index=False):
+        by_url.setdefault(row.url, row.embedding)
+    return [{"embedding_json": by_url[record["url"]]} for record in catalog.metadata]
+
+
+def _rss_kb():
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                name, kb, _ = line.split()
+                values[name.rstrip(":")] = int(kb)
+    return values
+
+
+def _worker(backend, directory):
+    from vector_index import ExactIndex, QuantizedIndex
+
+    before = _rss_kb()
+    matrix = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+    if backend == "float64-legacy":
+        index = ExactIndex(np.asarray(matrix, dtype=np.float64))
+    elif backend == "float32-exact":
+        index = ExactIndex(matrix)
+    else:
+        index = QuantizedIndex(np.load(os.path.join(directory, "embeddings_int8.npy"), mmap_mode="r"),
+                               np.load(os.path.join(directory, "scales.npy")), matrix)
+    rng = np.random.default_rng(1)
+    index.search(rng.standard_normal(DIM), K)
+    start = time.perf_counter()
+    for _ in range(20):
+        index.search(rng.standard_normal(DIM), K)
+    query_ms = (time.perf_counter() - start) / 20 * 1000
+    after = _rss_kb()
+    print(after["RssAnon"] - before["RssAnon"], after["RssFile"] - before["RssFile"], query_ms)
+
+
+def memory(rows):
+    from scoring import normalize_rows, quantize_rows
+
+    with tempfile.TemporaryDirectory() as directory:
+        rng = np.random.default_rng(0)
+        matrix = normalize_rows(rng.standard_normal((rows, DIM), dtype=np.float32))
+        quantized, scales = quantize_rows(matrix)
+        np.save(os.path.join(directory, "embeddings.npy"), matrix)
+        np.save(os.path.join(directory, "embeddings_int8.npy"), quantized)
+        np.save(os.path.join(directory, "scales.npy"), scales)
+        del matrix, quantized
+
+        print(f"\nMemory added per worker, {rows:,} x {DIM} synthetic catalog, after 20 queries:")
+        print(f"  {'backend':<16} {'private':>10} {'file-backed':>12} {'per query':>10}")
+        for backend in BACKENDS:
+            output = subprocess.run([sys.executable, __file__, "--worker", backend, directory],
+                                    capture_output=True, text=True, check=True).stdout
+            anon_kb, file_kb, query_ms = output.split()[-3:]
+            print(f"  {backend:<16} {int(anon_kb) / 1024:8.1f} MB {int(file_kb) / 1024:9.1f} MB "
+                  f"{float(query_ms):7.1f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], sys.argv[3])
+    else:
+        agreement(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "shl_assessments.csv"))
+        memory(int(sys.argv[2]) if len(sys.argv) > 2 else 200_000)
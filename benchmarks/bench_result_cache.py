@@ -0,0 +1,80 @@
+"""Latency of repeated /recommend calls with and without the result cache.
+
+Usage: python benchmarks/bench_result_cache.py [repeats] [embed_latency_ms]
+
+The embedding API is replaced by a fixed-latency stub (default 150 ms, about a warm Gemini
+call) and duration refreshes are disabled, so the run needs no network. The same dashboard
+query is sent through the Flask test client: once cold, then repeatedly with the result cache
+on and with it turned off (max_entries=0). recommend_cached is also timed on its own, without
+Flask, to show the cost of a hit.
+"""
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEATS = 50
+QUERY = {"job_description": "Hiring a Java developer who can collaborate with business teams. Max 40 minutes.",
+         "filters": {"remote_support": True}}
+
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main(repeats, embed_latency):
+    import pipeline
+    from catalog_index import load_catalog
+    from duration_store import DurationStore
+    from embedding_cache import EmbeddingCache
+    from result_cache import ResultCache
+
+    catalog = load_catalog(os.path.join(ROOT, "shl_assessments.csv"))
+    query = catalog.embeddings[0].tolist()
+
+    class StubEmbedder:
+        name = "stub"
+        remote = True
+
+        def embed(self, text, timeout=None, retry=True):
+            time.sleep(embed_latency)
+            return query
+
+    stub = StubEmbedder()
+    pipeline.catalog_embedder = lambda catalog: stub
+    pipeline.embedding_cache = EmbeddingCache(path=None, max_entries=0)
+    pipeline.duration_store = DurationStore(path=os.devnull, fetcher=None)
+
+    import api
+    client = api.app.test_client()
+
+    def post():
+        response = client.post("/recommend", json=QUERY)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response
+
+    start = time.perf_counter()
+    first = post()
+    print(f"Embedding stub latency {embed_latency * 1000:.0f} ms, median of {repeats} calls:")
+    print(f"  cold call                            {(time.perf_counter() - start) * 1000:9.3f} ms  "
+          f"(X-Cache: {first.headers['X-Cache']})")
+    print(f"  /recommend, result cache on          {_median_ms(post, repeats):9.3f} ms  "
+          f"(X-Cache: {post().headers['X-Cache']})")
+    hit_ms = _median_ms(lambda: pipeline.recommend_cached(catalog=catalog, **QUERY), repeats * 20)
+    print(f"  recommend_cached hit, no Flask       {hit_ms * 1000:9.1f} us")
+    pipeline.result_cache = ResultCache(max_entries=0)
+    print(f"  /recommend, result cache off         {_median_ms(post, repeats):9.3f} ms  "
+          f"(X-Cache: {post().headers['X-Cache']})")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else REPEATS, (float(args[1]) if len(args) > 1 else 150) / 1000)
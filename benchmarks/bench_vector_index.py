@@ -0,0 +1,81 @@
+"""Recall@k and per-query latency of the IVF backend against exact search on synthetic catalogs.
+
+Usage: python benchmarks/bench_vector_index.py [sizes] [dim] [queries]
+       e.g. python benchmarks/bench_vector_index.py 10000,100000,1000000 256 200
+
+Catalog rows are drawn from a two-level mixture on the unit sphere (broad topics split into
+overlapping subtopics; real embedding catalogs are clustered, not uniform), and queries are fresh
+draws from the same mixture. Each
+query is searched on its own, as /recommend does. The default dim is 256 so the 1M-row catalog
+plus its IVF copy fit in a few GB of RAM; pass 768 to match text-embedding-004.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scoring import normalize_rows  # noqa: E402
+from vector_index import ExactIndex, IVFIndex  # noqa: E402
+
+K = 10
+NPROBES = [1, 2, 4, 8, 16, 32, 64]
+ROWS_PER_TOPIC = 2000  # Broad topics, such as job families
+ROWS_PER_SUBTOPIC = 50  # Overlapping subtopics within a topic, which rows cluster around
+SUBTOPIC_SPREAD = 1.0
+NOISE = 1.0
+CHUNK_ROWS = 65536
+
+
+def synthetic_catalog(n_rows, dim, n_queries, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def jitter(centers, n, spread):
+        noise = rng.standard_normal((n, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+        return normalize_rows(centers[rng.integers(len(centers), size=n)] + noise)
+
+    topics = normalize_rows(rng.standard_normal((max(1, n_rows // ROWS_PER_TOPIC), dim), dtype=np.float32))
+    subtopics = jitter(topics, max(1, n_rows // ROWS_PER_SUBTOPIC), SUBTOPIC_SPREAD)
+
+    def draw(n):
+        rows = np.empty((n, dim), dtype=np.float32)
+        for start in range(0, n, CHUNK_ROWS):
+            rows[start:start + CHUNK_ROWS] = jitter(subtopics, min(CHUNK_ROWS, n - start), NOISE)
+        return rows
+
+    return draw(n_rows), draw(n_queries)
+
+
+def timed_search(index, queries, **kwargs):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, K, **kwargs)[0][0])
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main(sizes, dim, n_queries):
+    print(f"recall@{K} vs exact search, dim={dim}, {n_queries} single-vector queries per row")
+    print(f"{'catalog':>9}  {'backend':<14} {'recall':>7} {'ms/query':>9} {'speedup':>8}")
+    for n_rows in sizes:
+        matrix, queries = synthetic_catalog(n_rows, dim, n_queries)
+        truth, exact_ms = timed_search(ExactIndex(matrix), queries)
+        print(f"{n_rows:>9,}  {'exact':<14} {1.0:7.3f} {exact_ms:9.3f} {1.0:7.1f}x")
+
+        ivf = IVFIndex.build(matrix)
+        print(f"{'':>9}  (IVF build: {ivf.n_lists} lists, {ivf.meta['build_seconds']:.1f}s)")
+        for nprobe in NPROBES:
+            if nprobe > ivf.n_lists:
+                break
+            found, ivf_ms = timed_search(ivf, queries, nprobe=nprobe)
+            recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(truth, found)])
+            print(f"{'':>9}  {'ivf nprobe=' + str(nprobe):<14} {recall:7.3f} {ivf_ms:9.3f} {exact_ms / ivf_ms:7.1f}x")
+        del matrix, ivf
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main([int(s) for s in args[0].split(",")] if args else [10_000, 100_000, 1_000_000],
+         int(args[1]) if len(args) > 1 else 256,
+         int(args[2]) if len(args) > 2 else 200)
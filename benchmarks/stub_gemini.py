@@ -0,0 +1,54 @@
+"""Local stand-in for the Gemini embedding API, shared by the benchmarks.
+
+start_stub(latency) serves embedContent and batchEmbedContents on a free localhost port and
+answers every call after latency seconds, so a run needs no API key and spends no quota. Vectors
+come from a small precomputed pool, picked by a hash of each text, so the stub's own work stays
+small next to the code being measured while different texts still get different vectors.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIM = 768
+VECTORS = [json.dumps([random.Random(i).uniform(-1, 1) for _ in range(DIM)]) for i in range(64)]
+calls = {"embedContent": 0, "batchEmbedContents": 0}
+
+
+def _vector(content):
+    return VECTORS[zlib.crc32(content["parts"][0]["text"].encode("utf-8")) % len(VECTORS)]
+
+
+class StubGemini(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.server.latency)
+        if ":batchEmbedContents" in self.path:
+            calls["batchEmbedContents"] += 1
+            values = [_vector(request["content"]) for request in body["requests"]]
+            data = '{"embeddings": [' + ", ".join('{"values": %s}' % v for v in values) + "]}"
+        else:
+            calls["embedContent"] += 1
+            data = '{"embedding": {"values": %s}}' % _vector(body["content"])
+        data = data.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(latency):
+    """Start the stub in a daemon thread; returns (server, api_base). Call server.shutdown() when done."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGemini)
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1beta"
@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+ASSESSMENT_LENGTH_XPATH = "//h4[normalize-space()='Assessment length']"
+PAGE_LOAD_TIMEOUT = 15  # Seconds before driver.get() gives up on a page that never finishes loading
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+class PoolSaturated(Exception):
+    """Raised when no browser is free within the checkout timeout or the circuit breaker is open."""
+
+
+def headless_chrome():
+    """Start a headless Chrome, resolving the chromedriver binary only once per process."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+    options = Options()
+    options.add_argument("--headless")
+    driver = webdriver.Chrome(service=Service(_chromedriver_path), options=options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+class BrowserPool:
+    """Bounded pool of reusable headless browsers for the dynamic-page fallback.
+
+    Browsers are started on demand up to size and then reused. Each checkout health-checks the
+    browser, and a browser is recycled after max_uses pages. When every browser stays busy for
+    longer than checkout_timeout the fetch is skipped instead of queueing behind Chrome, and after
+    failure_threshold consecutive page failures the circuit breaker skips all fetches for cooldown seconds.
+    """
+
+    def __init__(self, size=2, max_uses=50, checkout_timeout=0.5, wait_timeout=5,
+                 failure_threshold=3, cooldown=30, driver_factory=headless_chrome):
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self.wait_timeout = wait_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.driver_factory = driver_factory
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._started = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def breaker_open(self):
+        return time.monotonic() < self._open_until
+
+    def _trip(self, reason):
+        self._open_until = time.monotonic() + self.cooldown
+        print(f"Browser pool circuit breaker open for {self.cooldown}s: {reason}")
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            failures = self._failures
+        if failures >= self.failure_threshold:
+            self._trip(f"{failures} consecutive failures")
+
+    def _healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._started -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _checkout(self):
+        if self.breaker_open():
+            raise PoolSaturated("circuit breaker open")
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_start = self._started < self.size
+                    if can_start:
+                        self._started += 1
+                if can_start:
+                    try:
+                        driver = self.driver_factory()
+                    except Exception:
+                        with self._lock:
+                            self._started -= 1
+                        raise
+                    with self._lock:
+                        self._uses[id(driver)] = 0
+                    return driver
+                try:
+                    driver = self._idle.get(timeout=self.checkout_timeout)
+                except queue.Empty:
+                    raise PoolSaturated("pool saturated")
+            if self._healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def _checkin(self, driver):
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            worn_out = self._uses[id(driver)] >= self.max_uses
+        if worn_out:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def page_source(self, url, wait_xpath=ASSESSMENT_LENGTH_XPATH):
+        """Load url in a pooled browser and return its HTML once wait_xpath appears (or the wait times out).
+
+        Returns None when the fallback is skipped because the pool is saturated or the breaker is open.
+        """
+        driver = None
+        try:
+            driver = self._checkout()
+            driver.get(url)
+            try:
+                WebDriverWait(driver, self.wait_timeout).until(
+                    EC.presence_of_element_located((By.XPATH, wait_xpath))
+                )
+            except TimeoutException:
+                pass  # Return whatever rendered; the caller decides whether it is usable
+            html = driver.page_source
+        except PoolSaturated as e:
+            print(f"Skipping browser fallback for {url}: {e}")
+            return None
+        except Exception as e:
+            if driver is not None:
+                self._discard(driver)
+            self._record_failure()
+            print(f"Error loading {url} in browser pool: {e}")
+            return None
+
+        with self._lock:
+            self._failures = 0
+        self._checkin(driver)
+        return html
+
+    def close(self):
+        """Quit every idle browser."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
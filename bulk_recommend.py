@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+import threading
+import time
+from multiprocessing import get_context
+
+from catalog_index import DEFAULT_DATASET_PATH, VERSIONS_DIR, build_index, default_index_dir
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "256"))  # Jobs embedded and scored together
+BULK_PROCESSES = int(os.getenv("BULK_PROCESSES", str(os.cpu_count() or 1)))
+BULK_INFLIGHT_PER_PROCESS = 2  # Batches queued per worker, so a huge input is never read ahead
+# Embedding requests per minute shared by all workers (each gets an equal slice)
+GEMINI_EMBED_RPM = int(os.getenv("GEMINI_EMBED_RPM", "1500"))
+REPORT_SECONDS = 10
+CSV_FIELD_LIMIT = 16 * 1024 * 1024  # Historical requisitions can exceed csv's 128 KB default
+
+# Per-worker state set up once by _init_worker
+_worker = {}
+
+
+def read_jobs(path):
+    """Stream (row_number, job) from a JSONL or CSV file without loading it.
+
+    Rows are numbered from 0 in file order (blank JSONL lines included), which keeps numbers
+    stable across resumed runs. A JSONL line that does not parse yields job None.
+    """
+    with open(path, newline="" if path.lower().endswith(".csv") else None, encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            csv.field_size_limit(CSV_FIELD_LIMIT)
+            yield from enumerate(csv.DictReader(f))
+            return
+        for row, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError:
+                job = None
+            yield row, job if isinstance(job, dict) else None
+
+
+class BulkSink:
+    """Append-only JSONL of ranked jobs, which doubles as the checkpoint of a bulk run.
+
+    With resume=True the rows already in the file are loaded (dropping a torn final line left by
+    a crash) and skipped; otherwise the file is started afresh. Records are written per batch in
+    completion order, so they carry their input row number.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.rows = set()
+        if resume and os.path.exists(path):
+            self._load()
+        else:
+            open(path, "wb").close()
+        self._file = open(path, "ab")
+
+    def _load(self):
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line in iter(f.readline, b""):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self.rows.add(record["row"])
+                valid_end += len(line)
+        os.truncate(self.path, valid_end)
+        print(f"Resuming bulk run: {len(self.rows)} jobs already ranked in {self.path}")
+
+    def done(self, row):
+        return row in self.rows
+
+    def write(self, records):
+        data = b"".join((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in records)
+        self._file.write(data)
+        self._file.flush()
+        self.rows.update(record["row"] for record in records)
+
+    def close(self):
+        self._file.close()
+
+
+def _init_worker(version_dir, top_n, processes, text_column, url_column, id_column):
+    # Imported here so the parent process stays free of the recommender's threads and clients
+    import pipeline
+    import recommenderRender  # noqa: F401  Configures the pipeline with GEMINI_API_KEY from the environment
+    from catalog_index import open_version
+    from embedder import get_embedder
+    from embedding_cache import EmbeddingCache
+    from rate_limiter import TokenBucket
+
+    catalog = open_version(version_dir)
+    embedder = pipeline.catalog_embedder(catalog)
+    if embedder.remote:
+        # A dedicated instance for this worker's share of the quota, leaving the shared one untouched
+        limiter = TokenBucket.per_minute(max(1, GEMINI_EMBED_RPM // processes), capacity=5)
+        embedder = get_embedder(catalog.embedder, api_key=pipeline.GEMINI_API_KEY, limiter=limiter)
+    # Memory only: one-off historical jobs would only bloat the shared SQLite embedding cache
+    pipeline.embedding_cache = EmbeddingCache(path=None)
+    _worker.update(recommender=pipeline, catalog=catalog, embedder=embedder, top_n=top_n, text_column=text_column,
+                   url_column=url_column, id_column=id_column)
+
+
+def _rank_jobs(batch):
+    """Worker: rank one batch of (row, job) pairs; returns (records, error)."""
+    recommender = _worker["recommender"]
+    catalog = _worker["catalog"]
+    try:
+        descriptions = []
+        for _, job in batch:
+            job = job or {}
+            description = job.get(_worker["text_column"])
+            if not description and job.get(_worker["url_column"]):
+                description = recommender.scrape_job_description(job[_worker["url_column"]])
+            descriptions.append(description if isinstance(description, str) and description != "N/A" else None)
+        ranked = recommender.rank_batch(descriptions, catalog, _worker["top_n"], _worker["embedder"])
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+    records = []
+    for (row, job), description, matches in zip(batch, descriptions, ranked):
+        record = {"row": row, "id": (job or {}).get(_worker["id_column"], row),
+                  "catalog_version": catalog.version["version"],
+                  "recommendations": [{
+                      "name": match["name"],
+                      "url": match["url"],
+                      "similarity": round(float(similarity), 6),
+                      # Stored durations only: a bulk run never waits on detail pages
+                      "duration": recommender.duration_store.peek(match["url"], default=match["duration"]),
+                      "test_type": match["test_type"],
+                      "remote_support": match["remote_support"],
+                      "adaptive_support": match["adaptive_support"],
+                  } for match, similarity in matches]}
+        if description is None:
+            record["error"] = "no job description"
+        records.append(record)
+    return records, None
+
+
+def _batches(jobs, sink, batch_size, slots):
+    batch = []
+    for row, job in jobs:
+        if sink.done(row):
+            continue
+        batch.append((row, job))
+        if len(batch) >= batch_size:
+            slots.acquire()
+            yield batch
+            batch = []
+    if batch:
+        slots.acquire()
+        yield batch
+
+
+def bulk_recommend(input_path, output_path, dataset_path=DEFAULT_DATASET_PATH, top_n=10, processes=BULK_PROCESSES,
+                   batch_size=BULK_BATCH_SIZE, resume=False, text_column="job_description", url_column="job_url",
+                   id_column="id"):
+    """Rank every job in a JSONL or CSV file and stream the results to a JSONL file.
+
+    Input is read in batches of batch_size. Each batch is embedded with one batched call and
+    scored with one matrix product by a pool of worker processes. At most
+    BULK_INFLIGHT_PER_PROCESS batches per worker are in flight. Every worker serves the same
+    catalog version, the one current when the run started. Batches that fail are reported and
+    left out of the output, so resume=True retries them together with everything not yet done.
+    Returns (jobs ranked, batches failed).
+    """
+    current = build_index(dataset_path)
+    version_dir = os.path.join(default_index_dir(dataset_path), VERSIONS_DIR, current["version"])
+    sink = BulkSink(output_path, resume)
+    processes = max(1, processes)
+    slots = threading.BoundedSemaphore(processes * BULK_INFLIGHT_PER_PROCESS)
+    print(f"🚀 Ranking {input_path} against catalog {current['version']} ({current['rows']} rows) "
+          f"with {processes} processes, {batch_size} jobs per batch")
+
+    start = time.perf_counter()
+    reported = start
+    ranked = failed = errors = 0
+    # Spawned, not forked: a forked worker would share the parent's pooled keep-alive sockets
+    with get_context("spawn").Pool(processes, initializer=_init_worker,
+                                   initargs=(version_dir, top_n, processes, text_column, url_column,
+                                             id_column)) as pool:
+        batches = _batches(read_jobs(input_path), sink, batch_size, slots)
+        for records, error in pool.imap_unordered(_rank_jobs, batches):
+            slots.release()
+            if error:
+                failed += 1
+                print(f"Error ranking a batch (it will be retried with --resume): {error}")
+                continue
+            sink.write(records)
+            ranked += len(records)
+            errors += sum(1 for record in records if "error" in record)
+            now = time.perf_counter()
+            if now - reported >= REPORT_SECONDS:
+                reported = now
+                print(f"  {ranked:,} jobs ranked, {ranked / (now - start):.1f} jobs/s")
+    sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Ranked {ranked:,} jobs in {elapsed:.1f}s ({ranked / elapsed if elapsed else 0:.1f} jobs/s) "
+          f"into {output_path}; {errors} without a usable description, {failed} failed batches")
+    return ranked, failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recommend assessments for a JSONL or CSV file of job descriptions.")
+    parser.add_argument("input_path", help='JSONL objects or CSV rows with "job_description" or "job_url"')
+    parser.add_argument("output_path", help="JSONL of ranked jobs, one record per input row")
+    parser.add_argument("--dataset-path", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=BULK_PROCESSES)
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    parser.add_argument("--resume", action="store_true", help="Skip jobs already in output_path and append the rest")
+    parser.add_argument("--text-column", default="job_description")
+    parser.add_argument("--url-column", default="job_url")
+    parser.add_argument("--id-column", default="id", help="Copied into each result; defaults to the row number")
+    args = parser.parse_args()
+    bulk_recommend(args.input_path, args.output_path, args.dataset_path, args.top_n, args.processes,
+                   args.batch_size, args.resume, args.text_column, args.url_column, args.id_column)
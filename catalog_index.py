@@ -0,0 +1,365 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from embedder import DEFAULT_EMBEDDER
+from lexical_index import LexicalIndex
+from scoring import normalize_rows, quantize_rows
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builds are not serialized across processes
+    fcntl = None
+
+DEFAULT_DATASET_PATH = "shl_assessments.csv"
+INDEX_FORMAT_VERSION = 6
+METADATA_COLUMNS = ["name", "url", "description", "duration", "test_type", "remote_support", "adaptive_support"]
+
+EMBEDDINGS_FILE = "embeddings.npy"
+QUANTIZED_FILE = "embeddings_int8.npy"  # Compact copy for candidate generation
+SCALES_FILE = "scales.npy"
+METADATA_FILE = "metadata.json"
+VERSION_FILE = "version.json"
+VERSIONS_DIR = "versions"  # One immutable subdirectory per catalog version
+CURRENT_FILE = "current.json"  # Points at the active version; replaced atomically after each build
+BUILD_LOCK_FILE = ".build.lock"
+KEEP_VERSIONS = 3  # Older version directories are pruned after a successful build
+
+# How often a serving process checks the CSV and current.json for a new catalog version
+CATALOG_CHECK_SECONDS = float(os.getenv("CATALOG_CHECK_SECONDS", "5"))
+
+# Process-wide catalog state, keyed by index directory
+_loaded_catalogs = {}
+_loaded_catalogs_lock = threading.Lock()
+
+
+class Catalog:
+    """Deduplicated assessment catalog backed by a memory-mapped, unit-normalized float32 embedding matrix.
+
+    quantized/scales hold the same rows as per-row-scaled int8, also memory-mapped, for backends
+    that generate candidates from the compact copy. index_dir is the immutable directory of this
+    version, so anything cached per index_dir is also cached per version. embedder names the
+    embedder that produced the rows (see embedder.get_embedder); queries must use the same one.
+    Search structures built from a catalog (vector, filter and lexical indexes) are cached on it
+    with derived(), so they live and die with the catalog version they describe.
+    """
+
+    def __init__(self, embeddings, metadata, version, index_dir=None, quantized=None, scales=None):
+        self.embeddings = embeddings
+        self.metadata = metadata
+        self.version = version
+        self.index_dir = index_dir
+        self.quantized = quantized
+        self.scales = scales
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.metadata)
+
+    @property
+    def embedder(self):
+        return self.version.get("embedder", DEFAULT_EMBEDDER)
+
+    def derived(self, key, build):
+        """Return the structure cached under key, calling build() once to create it."""
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = self._derived[key] = build()
+        return value
+
+    def record(self, idx):
+        """Return a copy of the metadata row at position idx."""
+        return dict(self.metadata[idx])
+
+
+def default_index_dir(dataset_path):
+    """Index directory that sits next to the CSV it was compiled from."""
+    return os.path.splitext(dataset_path)[0] + ".index"
+
+
+def _source_stamp(dataset_path):
+    stat = os.stat(dataset_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class _BuildLock:
+    """Exclusive lock on the index directory, so only one process builds a version at a time."""
+
+    def __init__(self, index_dir):
+        self.path = os.path.join(index_dir, BUILD_LOCK_FILE)
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def _write_version_dir(data, source_sha256, dataset_path, version_dir):
+    """Compile CSV bytes into a version directory (embeddings, int8 copy, BM25 index, metadata, version.json)."""
+    df = pd.read_csv(io.BytesIO(data))
+    df = df.drop_duplicates(subset=["name", "url"], keep="first")
+
+    embeddings = []
+    metadata = []
+    embedder = None
+    for row in df.itertuples(index=False):
+        try:
+            emb = json.loads(row.embedding)
+        except (TypeError, ValueError):
+            continue
+        if not emb:
+            continue
+        if embeddings and len(emb) != len(embeddings[0]):
+            print(f"Skipping {row.url}: embedding has {len(emb)} dims, expected {len(embeddings[0])}")
+            continue
+        # CSVs written before embedders were recorded have no embedder column: all Gemini
+        row_embedder = getattr(row, "embedder", None)
+        row_embedder = DEFAULT_EMBEDDER if pd.isna(row_embedder) or row_embedder in ("", "N/A") else row_embedder
+        if embedder is not None and row_embedder != embedder:
+            print(f"Skipping {row.url}: embedded by {row_embedder}, expected {embedder}")
+            continue
+        embedder = row_embedder
+        embeddings.append(emb)
+        record = {}
+        for col in METADATA_COLUMNS:
+            value = getattr(row, col)
+            record[col] = None if pd.isna(value) else value
+        metadata.append(record)
+
+    # Rows are stored pre-normalized so cosine similarity is a single dot product at query time
+    matrix = normalize_rows(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+
+    os.makedirs(version_dir)
+    np.save(os.path.join(version_dir, EMBEDDINGS_FILE), matrix)
+    quantized, scales = quantize_rows(matrix)
+    np.save(os.path.join(version_dir, QUANTIZED_FILE), quantized)
+    np.save(os.path.join(version_dir, SCALES_FILE), scales)
+    LexicalIndex.build(metadata).save(version_dir)
+    with open(os.path.join(version_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, separators=(",", ":"))
+
+    version = {
+        "format": INDEX_FORMAT_VERSION,
+        "version": source_sha256[:12],
+        "source": os.path.basename(dataset_path),
+        "source_sha256": source_sha256,
+        "rows": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "embedder": embedder or DEFAULT_EMBEDDER,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    _write_json_atomic(os.path.join(version_dir, VERSION_FILE), version)
+    return version
+
+
+def _prune_versions(index_dir, active):
+    """Delete all but the newest KEEP_VERSIONS version directories.
+
+    Processes still serving an older version keep working: on POSIX, files that are already
+    memory-mapped stay readable after they are unlinked.
+    """
+    versions_root = os.path.join(index_dir, VERSIONS_DIR)
+    entries = []
+    for name in os.listdir(versions_root):
+        path = os.path.join(versions_root, name)
+        if name != active and os.path.isdir(path):
+            entries.append((os.path.getmtime(path), path))
+    for _, path in sorted(entries, reverse=True)[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def build_index(dataset_path=DEFAULT_DATASET_PATH, index_dir=None):
+    """Compile the CSV dataset into a new index version and make it current.
+
+    Each version is written to a temporary directory, renamed into versions/<version>/ and only
+    then published by atomically replacing current.json, so readers never see a partial index.
+    Concurrent builders serialize on a lock file, and a build that finds the CSV already indexed
+    returns without doing any work.
+    """
+    index_dir = index_dir or default_index_dir(dataset_path)
+    start = time.perf_counter()
+    os.makedirs(os.path.join(index_dir, VERSIONS_DIR), exist_ok=True)
+
+    with _BuildLock(index_dir):
+        current = _read_current(index_dir)
+        if _index_is_current(current, dataset_path):
+            return current
+
+        # Stamp first and hash the exact bytes that are parsed, so a CSV replaced mid-build is
+        # detected by the next check instead of being indexed under the wrong version
+        stamp = _source_stamp(dataset_path)
+        with open(dataset_path, "rb") as f:
+            data = f.read()
+        source_sha256 = hashlib.sha256(data).hexdigest()
+        version_dir = os.path.join(index_dir, VERSIONS_DIR, source_sha256[:12])
+
+        version = _read_version(version_dir)
+        if not version or version.get("format") != INDEX_FORMAT_VERSION:
+            tmp_dir = f"{version_dir}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            version = _write_version_dir(data, source_sha256, dataset_path, tmp_dir)
+            shutil.rmtree(version_dir, ignore_errors=True)
+            os.replace(tmp_dir, version_dir)
+
+        current = dict(version, source_stamp=stamp)
+        _write_json_atomic(os.path.join(index_dir, CURRENT_FILE), current)
+        _prune_versions(index_dir, version["version"])
+
+    print(f"✅ Built index {current['version']} with {current['rows']} rows in {index_dir} "
+          f"({time.perf_counter() - start:.2f}s)")
+    return current
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_version(version_dir):
+    return _read_json(os.path.join(version_dir, VERSION_FILE))
+
+
+def _read_current(index_dir):
+    return _read_json(os.path.join(index_dir, CURRENT_FILE))
+
+
+def _index_is_current(current, dataset_path):
+    if not current or current.get("format") != INDEX_FORMAT_VERSION:
+        return False
+    if not os.path.exists(dataset_path):
+        # No source to compare against, so trust the shipped index
+        return True
+    return current.get("source_stamp") == _source_stamp(dataset_path)
+
+
+def open_version(version_dir):
+    """Open one built index version with its matrices memory-mapped read-only.
+
+    Every worker process that opens the same version maps the same files, so the embedding pages
+    live once in the shared page cache rather than once per worker.
+    """
+    version = _read_version(version_dir)
+    if version is None:
+        raise FileNotFoundError(f"No catalog index found in {version_dir}")
+    embeddings = np.load(os.path.join(version_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    quantized = np.load(os.path.join(version_dir, QUANTIZED_FILE), mmap_mode="r")
+    scales = np.load(os.path.join(version_dir, SCALES_FILE), mmap_mode="r")
+    with open(os.path.join(version_dir, METADATA_FILE), encoding="utf-8") as f:
+        metadata = json.load(f)
+    return Catalog(embeddings, metadata, version, version_dir, quantized, scales)
+
+
+def open_index(index_dir):
+    """Open the current version of an index directory."""
+    current = _read_current(index_dir)
+    if current is None:
+        raise FileNotFoundError(f"No catalog index found in {index_dir}")
+    return open_version(os.path.join(index_dir, VERSIONS_DIR, current["version"]))
+
+
+class _LoadedCatalog:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.checked_at = time.monotonic()
+        self.building = False
+
+
+def _check_for_update(state, dataset_path, index_dir):
+    """Swap in a newer published version, or start a background build when the CSV has changed."""
+    now = time.monotonic()
+    if now - state.checked_at < CATALOG_CHECK_SECONDS:
+        return
+    state.checked_at = now
+
+    current = _read_current(index_dir)
+    if current and current.get("format") == INDEX_FORMAT_VERSION \
+            and current["version"] != state.catalog.version["version"]:
+        _swap(state, index_dir)
+    elif not _index_is_current(current, dataset_path) and not state.building:
+        state.building = True
+        threading.Thread(target=_build_in_background, args=(state, dataset_path, index_dir),
+                         name="catalog-build", daemon=True).start()
+
+
+def _swap(state, index_dir):
+    try:
+        catalog = open_index(index_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error opening new catalog version in {index_dir}: {e}")
+        return
+    previous = state.catalog.version["version"]
+    # A single reference assignment: requests already holding the old catalog finish on it
+    state.catalog = catalog
+    if catalog.version["version"] != previous:
+        print(f"🔄 Catalog {previous} -> {catalog.version['version']} ({len(catalog)} rows)")
+
+
+def _build_in_background(state, dataset_path, index_dir):
+    try:
+        build_index(dataset_path, index_dir)
+        _swap(state, index_dir)
+    except Exception as e:
+        print(f"Error rebuilding catalog index: {e}")
+    finally:
+        state.building = False
+
+
+def load_catalog(dataset_path=DEFAULT_DATASET_PATH, index_dir=None):
+    """Return the process-wide current catalog, hot-reloading it when the dataset changes.
+
+    The first call builds the index only if none exists yet. After that, a changed CSV is rebuilt
+    by a background thread (or picked up from another process that built it) and swapped in
+    atomically, while callers keep being served the previous version until then.
+    """
+    index_dir = index_dir or default_index_dir(dataset_path)
+    state = _loaded_catalogs.get(index_dir)
+    if state is None:
+        with _loaded_catalogs_lock:
+            state = _loaded_catalogs.get(index_dir)
+            if state is None:
+                current = _read_current(index_dir)
+                if not current or current.get("format") != INDEX_FORMAT_VERSION:
+                    build_index(dataset_path, index_dir)
+                state = _loaded_catalogs[index_dir] = _LoadedCatalog(open_index(index_dir))
+                # Check right away, so a stale index is served only while its replacement builds
+                state.checked_at -= CATALOG_CHECK_SECONDS
+    _check_for_update(state, dataset_path, index_dir)
+    return state.catalog
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile the SHL assessment CSV into a binary catalog index.")
+    parser.add_argument("dataset_path", nargs="?", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--index-dir", default=None)
+    args = parser.parse_args()
+    build_index(args.dataset_path, args.index_dir)
@@ -0,0 +1,56 @@
+import os
+import re
+
+# "off" embeds each description as one vector; "max" or "mean" split long descriptions into
+# overlapping chunks and score catalog rows by the best, or length-weighted mean, chunk similarity
+EMBEDDING_CHUNKING = os.getenv("EMBEDDING_CHUNKING", "off")
+CHUNK_CHARS = int(os.getenv("CHUNK_CHARS", "1500"))  # About 350 tokens, well inside the embedding input limit
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "300"))
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", "16"))
+# With chunking on, job pages are extracted up to this many characters instead of 5,000
+CHUNKED_DESCRIPTION_MAX_CHARS = CHUNK_CHARS * MAX_CHUNKS - CHUNK_OVERLAP_CHARS * (MAX_CHUNKS - 1)
+AGGREGATIONS = ("max", "mean")
+
+
+def chunking_enabled(mode=None):
+    mode = mode or EMBEDDING_CHUNKING
+    if mode != "off" and mode not in AGGREGATIONS:
+        raise ValueError(f"Unknown EMBEDDING_CHUNKING mode: {mode}")
+    return mode != "off"
+
+
+def split_text(text, chunk_chars=CHUNK_CHARS, overlap_chars=CHUNK_OVERLAP_CHARS, max_chunks=MAX_CHUNKS):
+    """Split whitespace-normalized text into at most max_chunks windows of about chunk_chars.
+
+    Consecutive windows share about overlap_chars, so a requirement that straddles a boundary is
+    whole in at least one chunk. Windows end at a sentence boundary when one falls in their last
+    third, else at a space. Text that fits in one window is returned as a single chunk.
+    """
+    text = re.sub(r"\s+", " ", text).strip()
+    chunks = []
+    start = 0
+    while start < len(text) and len(chunks) < max_chunks:
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            window = text[start:end]
+            cut = max(window.rfind(". ", len(window) * 2 // 3), window.rfind("! ", len(window) * 2 // 3),
+                      window.rfind("? ", len(window) * 2 // 3))
+            if cut > 0:
+                end = start + cut + 1
+            elif window.rfind(" ") > 0:
+                end = start + window.rfind(" ")
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        # Step back by the overlap, to the start of a word
+        next_start = max(end - overlap_chars, start + 1)
+        space = text.find(" ", next_start)
+        start = space + 1 if 0 <= space < end else next_start
+    return [chunk for chunk in chunks if chunk]
+
+
+def chunk_weights(chunks):
+    """Weight of each chunk in the "mean" aggregation: its share of the text length."""
+    lengths = [len(chunk) for chunk in chunks]
+    total = sum(lengths) or 1
+    return [length / total for length in lengths]
@@ -0,0 +1,81 @@
+import json
+import sqlite3
+import threading
+import time
+
+from embedding_cache import cache_key
+
+DEFAULT_CLASSIFICATION_CACHE_PATH = "classification_cache.sqlite3"
+CLASSIFICATION_TTL_SECONDS = 180 * 24 * 3600
+
+
+class ClassificationCache:
+    """SQLite cache of LLM classifications, keyed by a hash of the description and the model.
+
+    Lets the crawler skip classifying a description it has already seen on an earlier run. Only
+    real model answers should be put; fallbacks from failed calls are left out so they are retried.
+    """
+
+    def __init__(self, path=DEFAULT_CLASSIFICATION_CACHE_PATH, ttl=CLASSIFICATION_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {"hits": 0, "misses": 0}
+
+    def _db(self):
+        if self._conn is None and self.path:
+            try:
+                conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS classifications "
+                    "(key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"Classification cache disabled: {e}")
+                self.path = None
+        return self._conn
+
+    def get(self, description, model):
+        """Return the cached classification dict for description, or None on a miss."""
+        key = cache_key(description, model)
+        with self._lock:
+            conn = self._db()
+            row = None
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT result, created_at FROM classifications WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Error reading classification cache: {e}")
+            if row is None or time.time() - row[1] >= self.ttl:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+        return json.loads(row[0])
+
+    def put_many(self, items, model):
+        """Store (description, classification) pairs in one transaction."""
+        rows = [(cache_key(description, model), json.dumps(result), time.time()) for description, result in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO classifications (key, result, created_at) VALUES (?, ?, ?)", rows
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing classification cache: {e}")
+
+    def stats(self):
+        """Hit and miss counters."""
+        with self._lock:
+            return dict(self._counters)
@@ -1,118 +1,231 @@
-import requests
+import http_client
 from bs4 import BeautifulSoup
 import pandas as pd
 import time
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from contextlib import contextmanager
+import csv
 import json
+import os
+from rate_limiter import TokenBucket
+from duration_store import DurationStore, parse_duration
+from embedder import DEFAULT_EMBEDDER, EMBEDDER, get_embedder
+from classification_cache import ClassificationCache
 
 # Gemini API configuration
 GEMINI_API_KEY = "XYZ"  # Replace with your API key from https://ai.google.dev/
 GEMINI_TEXT_MODEL = "gemini-2.0-flash"
-GEMINI_EMBEDDING_MODEL = "text-embedding-004"
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_EMBED_BATCH_SIZE = 100  # Max requests per batchEmbedContents call
+CLASSIFY_BATCH_SIZE = int(os.getenv("CLASSIFY_BATCH_SIZE", "10"))  # Descriptions per generateContent call
+
+# Shared request quotas: every worker thread draws from the same bucket instead of sleeping on its own
+GEMINI_TEXT_RPM = int(os.getenv("GEMINI_TEXT_RPM", "15"))
+GEMINI_EMBED_RPM = int(os.getenv("GEMINI_EMBED_RPM", "1500"))
+text_limiter = TokenBucket.per_minute(GEMINI_TEXT_RPM, capacity=1)
+embed_limiter = TokenBucket.per_minute(GEMINI_EMBED_RPM, capacity=5)
+# Catalog embedder (EMBEDDER env, default Gemini); its name is stored with every row
+embedder = get_embedder(EMBEDDER, api_key=GEMINI_API_KEY, limiter=embed_limiter)
+# Classifications from earlier crawls, keyed by description and GEMINI_TEXT_MODEL
+classification_cache = ClassificationCache()
 
 BASE_URL = "https://www.shl.com/solutions/products/product-catalog/"
+# (type parameter, page count, label), in output order
+CATALOG_TYPES = [(2, 12, "Prepackaged"), (1, 32, "Individual")]
+
+# Crawl pipeline tuning
+SHL_MAX_CONCURRENCY = int(os.getenv("SHL_MAX_CONCURRENCY", "5"))  # In-flight requests to shl.com
+CLASSIFY_WORKERS = 2  # Classification requests in flight
+PIPELINE_QUEUE_SIZE = 50
+EMBED_FLUSH_SECONDS = 2.0
+
+DATASET_COLUMNS = ["name", "url", "description", "duration", "test_type", "remote_support",
+                   "adaptive_support", "embedding", "embedder", "etag", "last_modified"]
+REPORT_FIELDS = ("name", "description", "duration", "test_type", "remote_support", "adaptive_support")
+CLASSIFICATION_FIELDS = ("test_type", "adaptive_support", "remote_support")
+TEST_TYPES = ("Knowledge & Skills", "Personality & Behaviour", "Other")
+CLASSIFICATION_FALLBACK = {"test_type": "N/A", "adaptive_support": "no", "remote_support": "no"}
+CLASSIFICATION_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            "test_type": {"type": "STRING", "enum": list(TEST_TYPES)},
+            "adaptive_support": {"type": "STRING", "enum": ["yes", "no"]},
+            "remote_support": {"type": "STRING", "enum": ["yes", "no"]},
+        },
+        "required": ["id", *CLASSIFICATION_FIELDS],
+    },
+}
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36"
 }
 
-def get_gemini_classification(description):
-    """Use Gemini-2.0-flash to classify test_type, adaptive_support, and remote_support."""
+def get_gemini_classifications(descriptions):
+    """Classify several descriptions with one structured Gemini-2.0-flash request.
+
+    Returns one dict of test_type, adaptive_support and remote_support per description, in order.
+    An entry is None when the request failed or the model skipped it or answered out of schema.
+    """
+    results = [None] * len(descriptions)
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_TEXT_MODEL}:generateContent?key={GEMINI_API_KEY}"
+        url = f"{GEMINI_API_BASE}/models/{GEMINI_TEXT_MODEL}:generateContent?key={GEMINI_API_KEY}"
         headers = {"Content-Type": "application/json"}
+        numbered = "\n".join(f"{i}. {json.dumps(description, ensure_ascii=False)}"
+                             for i, description in enumerate(descriptions))
         prompt = f"""
-        Analyze the following assessment description: "{description}"
-        Output a JSON object with:
+        Analyze each of the following numbered assessment descriptions:
+        {numbered}
+        Output a JSON array with one object per description, each with:
+        - id: the description's number
         - test_type: One of "Knowledge & Skills", "Personality & Behaviour", or "Other"
         - adaptive_support: "yes" or "no"
         - remote_support: "yes" or "no"
         """
         data = {
             "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {"response_mime_type": "application/json"}
+            "generationConfig": {"response_mime_type": "application/json", "response_schema": CLASSIFICATION_SCHEMA}
         }
-        response = requests.post(url, json=data, headers=headers)
+        text_limiter.acquire()
+        response = http_client.post(url, json=data, headers=headers)
         response.raise_for_status()
-        result = json.loads(response.json()["candidates"][0]["content"]["parts"][0]["text"])
-        time.sleep(0.1)  # Respect free tier rate limits (1500 requests/hour)
-        return result
+        answer = json.loads(response.json()["candidates"][0]["content"]["parts"][0]["text"])
+        for item in answer:
+            i = item.get("id")
+            if not isinstance(i, int) or not 0 <= i < len(descriptions):
+                continue
+            result = {field: str(item.get(field, "")).strip() for field in CLASSIFICATION_FIELDS}
+            result["adaptive_support"] = result["adaptive_support"].lower()
+            result["remote_support"] = result["remote_support"].lower()
+            if result["test_type"] in TEST_TYPES and {result["adaptive_support"], result["remote_support"]} <= {"yes", "no"}:
+                results[i] = result
     except Exception as e:
         print(f"Error with Gemini classification: {e}")
-        return {
-            "test_type": "N/A",
-            "adaptive_support": "no",
-            "remote_support": "no"
-        }
+    return results
+
+def needs_classification(assessment):
+    return any(assessment[field] == "N/A" for field in CLASSIFICATION_FIELDS)
+
+def classify_assessments(assessments):
+    """Use Gemini to classify assessments whose listing fields are ambiguous, in place.
 
-def get_gemini_embedding(text):
-    """Generate embedding using text-embedding-004."""
+    Cached classifications are reused. The remaining distinct descriptions are sent
+    CLASSIFY_BATCH_SIZE at a time, and only real answers are cached, so failures are retried on
+    the next crawl. Returns the number of Gemini requests made.
+    """
+    pending = [assessment for assessment in assessments if needs_classification(assessment)]
+    results = {}
+    missing = []
+    for description in dict.fromkeys(assessment["description"] for assessment in pending):
+        cached = classification_cache.get(description, GEMINI_TEXT_MODEL)
+        if cached is not None:
+            results[description] = cached
+        else:
+            missing.append(description)
+    requests = 0
+    for start in range(0, len(missing), CLASSIFY_BATCH_SIZE):
+        chunk = missing[start:start + CLASSIFY_BATCH_SIZE]
+        classified = [(description, result)
+                      for description, result in zip(chunk, get_gemini_classifications(chunk)) if result]
+        requests += 1
+        classification_cache.put_many(classified, GEMINI_TEXT_MODEL)
+        results.update(classified)
+    for assessment in pending:
+        assessment.update(results.get(assessment["description"], CLASSIFICATION_FALLBACK))
+    return requests
+
+def parse_detail_page(soup):
+    """Extract (description, duration) from an assessment detail page."""
+    # Extract description using provided HTML structure
+    description_elem = soup.select_one("div.product-catalogue-training-calendar__row.typ p")
+    description = description_elem.get_text(strip=True) if description_elem else "N/A"
+    
+    # Extract duration, preferring the "Assessment length" section the recommenders read
+    duration_info = parse_duration(soup)
+    detail_sections = soup.find_all("div", class_="product-detail__section") if duration_info == "N/A" else []
+    for section in detail_sections:
+        section_text = section.text.lower()
+        if "duration" in section_text or "time" in section_text or "minutes" in section_text:
+            duration_match = re.search(r'(\d+)\s*(?:min|minute)', section_text)
+            if duration_match:
+                duration_info = f"{duration_match.group(1)} minutes"
+                break
+    return description, duration_info
+
+def reuse_previous(assessment, previous):
+    """Copy stored description, duration, classification and embedding onto a freshly listed assessment."""
+    assessment["description"] = previous["description"]
+    assessment["duration"] = previous["duration"]
+    for field in ("test_type", "adaptive_support", "remote_support"):
+        if assessment[field] == "N/A":
+            assessment[field] = previous[field]
+    # An embedding from another embedder is not comparable with the rest of the catalog: re-embed
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_EMBEDDING_MODEL}:embedContent?key={GEMINI_API_KEY}"
-        headers = {"Content-Type": "application/json"}
-        data = {
-            "model": f"models/{GEMINI_EMBEDDING_MODEL}",
-            "content": {"parts": [{"text": text}]}
-        }
-        response = requests.post(url, json=data, headers=headers)
-        response.raise_for_status()
-        embedding = response.json()["embedding"]["values"]
-        time.sleep(0.1)  # Respect free tier rate limits (1500 requests/day)
-        return embedding
-    except Exception as e:
-        print(f"Error generating embedding: {e}")
-        return []
+        reusable = previous["embedder"] == embedder.name
+        assessment["embedding"] = json.loads(previous["embedding"]) if reusable else []
+    except (TypeError, ValueError):
+        assessment["embedding"] = []
+
+def request_detail_page(url, previous=None):
+    """GET a detail page, conditionally with the stored ETag/Last-Modified when previous is given."""
+    headers = dict(HEADERS)
+    if previous is not None:
+        if previous.get("etag", "N/A") != "N/A":
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified", "N/A") != "N/A":
+            headers["If-Modified-Since"] = previous["last_modified"]
+    return http_client.get(url, headers=headers)
 
-def fetch_assessment_details(assessment):
-    """Fetch description, duration, and embeddings from the assessment's detail page."""
+def apply_detail_page(assessment, response, previous=None):
+    """Parse a detail page response into assessment. Returns "added", "changed", "unchanged" or "error".
+
+    In incremental mode previous is the stored row for this URL; on a 304 or identical extracted
+    content the stored description, classification and embedding are reused.
+    """
     url = assessment["url"]
     try:
-        response = requests.get(url, headers=HEADERS)
+        if response.status_code == 304 and previous is not None:
+            reuse_previous(assessment, previous)
+            assessment["etag"] = previous["etag"]
+            assessment["last_modified"] = previous["last_modified"]
+            return "unchanged"
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, "html.parser")
+            description, duration_info = parse_detail_page(soup)
+            assessment["etag"] = response.headers.get("ETag", "N/A")
+            assessment["last_modified"] = response.headers.get("Last-Modified", "N/A")
             
-            # Extract description using provided HTML structure
-            description_elem = soup.select_one("div.product-catalogue-training-calendar__row.typ p")
-            description = description_elem.get_text(strip=True) if description_elem else "N/A"
-            
-            # Extract duration
-            duration_info = "N/A"
-            detail_sections = soup.find_all("div", class_="product-detail__section")
-            for section in detail_sections:
-                section_text = section.text.lower()
-                if "duration" in section_text or "time" in section_text or "minutes" in section_text:
-                    duration_match = re.search(r'(\d+)\s*(?:min|minute)', section_text)
-                    if duration_match:
-                        duration_info = f"{duration_match.group(1)} minutes"
-                        break
-            
-            # Use Gemini to classify if fields are ambiguous
-            if assessment["test_type"] == "N/A" or assessment["adaptive_support"] == "N/A" or \
-               assessment["remote_support"] == "N/A":
-                gemini_result = get_gemini_classification(description)
-                assessment["test_type"] = gemini_result["test_type"]
-                assessment["adaptive_support"] = gemini_result["adaptive_support"]
-                assessment["remote_support"] = gemini_result["remote_support"]
-            
-            # Generate embedding for description
-            embedding = get_gemini_embedding(description) if description != "N/A" else []
+            # Same extracted content as the stored row: nothing to re-classify or re-embed
+            if previous is not None and previous["description"] == description and previous["duration"] == duration_info:
+                reuse_previous(assessment, previous)
+                return "unchanged"
             
             # Update assessment
             assessment.update({
                 "description": description,
-                "duration": duration_info,
-                "embedding": embedding
+                "duration": duration_info
             })
+            return "added" if previous is None else "changed"
+        print(f"Failed to fetch details for {url}: {response.status_code}")
         
     except Exception as e:
         print(f"Error fetching details for {url}: {e}")
+    
+    return mark_detail_error(assessment, previous)
+
+def mark_detail_error(assessment, previous=None):
+    """Keep the stored row on a failed detail fetch rather than dropping data on a transient failure."""
+    if previous is not None:
+        reuse_previous(assessment, previous)
+    else:
         assessment.update({
             "description": "N/A",
             "duration": "N/A",
             "embedding": []
         })
-    
-    return assessment
+    return "error"
 
 def scrape_table(table):
     """Extract data from a single table."""
@@ -142,84 +255,364 @@ def scrape_table(table):
         assessments.append({
             "name": name,
             "url": "https://www.shl.com" + url,
-            "description": "N/A",  # Updated in fetch_assessment_details
-            "duration": "N/A",     # Updated in fetch_assessment_details
+            "description": "N/A",  # Updated in the detail stage
+            "duration": "N/A",     # Updated in the detail stage
             "test_type": test_type,
             "remote_support": remote_support,
             "adaptive_support": adaptive_support,
-            "embedding": []        # Updated in fetch_assessment_details
+            "embedding": [],       # Updated in the embed stage
+            "embedder": embedder.name,
+            "etag": "N/A",         # Detail page validators for incremental crawls
+            "last_modified": "N/A"
         })
 
     return assessments
 
-def scrape_pages_for_type(type_param, max_pages, label):
-    """Scrape paginated assessment tables for a given type (1 or 2)."""
-    all_assessments = []
-    for page_start in range(0, max_pages * 12, 12):
+def load_previous_dataset(filename="shl_assessments.csv"):
+    """Stored rows keyed by URL for incremental crawls (embeddings stay JSON text until reused)."""
+    if not os.path.exists(filename):
+        print(f"No existing dataset at {filename}; every assessment will be processed.")
+        return {}
+    df = pd.read_csv(filename).drop_duplicates(subset=["url"], keep="first")
+    for column in ("etag", "last_modified"):
+        if column not in df.columns:
+            df[column] = "N/A"
+    if "embedder" not in df.columns:
+        df["embedder"] = DEFAULT_EMBEDDER
+    df = df.fillna("N/A")
+    return {row["url"]: row for row in df.to_dict("records")}
+
+def final_status(assessment, status, previous):
+    """Classify a processed row against the stored dataset as added, changed, unchanged or error."""
+    stored = previous.get(assessment["url"])
+    if status == "error":
+        return "error"
+    if stored is None:
+        return "added"
+    if status == "changed" or any(assessment[field] != stored[field] for field in REPORT_FIELDS):
+        return "changed"
+    return "unchanged"
+
+def print_crawl_report(urls, statuses, previous):
+    """Summarize added, changed and removed rows for an incremental crawl."""
+    report = {"added": [], "changed": [], "removed": [], "unchanged": 0, "error": 0}
+    for url in dict.fromkeys(urls):
+        status = statuses.get(url)
+        if status in ("added", "changed"):
+            report[status].append(url)
+        elif status in ("unchanged", "error"):
+            report[status] += 1
+    seen = set(urls)
+    report["removed"] = [url for url in previous if url not in seen]
+
+    print(f"📋 Crawl report: {len(report['added'])} added, {len(report['changed'])} changed, "
+          f"{len(report['removed'])} removed, {report['unchanged']} unchanged, {report['error']} errors")
+    for label in ("added", "changed", "removed"):
+        for url in report[label]:
+            print(f"  {label}: {url}")
+    return report
+
+class CrawlSink:
+    """Append-only JSONL of finished assessments, written as each one completes.
+
+    The URLs already in the file are the crawl checkpoint: with resume=True they are loaded (dropping
+    a torn final line left by a crash) and skipped by the pipeline. Only byte offsets are kept in
+    memory, so records can be streamed back out in listing order without holding the catalog.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.offsets = {}
+        self.statuses = {}
+        if resume and os.path.exists(path):
+            self._load()
+        else:
+            open(path, "wb").close()
+        self._file = open(path, "ab")
+
+    def _load(self):
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line in iter(f.readline, b""):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self.offsets[record["url"]] = valid_end
+                self.statuses[record["url"]] = record["status"]
+                valid_end += len(line)
+        os.truncate(self.path, valid_end)
+        print(f"Resuming crawl: {len(self.offsets)} assessments already completed in {self.path}")
+
+    def done(self, url):
+        return url in self.offsets
+
+    def write(self, assessment, status):
+        record = {column: assessment[column] for column in DATASET_COLUMNS}
+        record["status"] = status
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self.offsets[assessment["url"]] = self._file.tell()
+        self.statuses[assessment["url"]] = status
+        self._file.write(line)
+        self._file.flush()
+
+    def records(self, urls):
+        """Yield the stored record for each URL in order (URLs listed twice are yielded twice)."""
+        with open(self.path, "rb") as f:
+            for url in urls:
+                if url in self.offsets:
+                    f.seek(self.offsets[url])
+                    yield json.loads(f.readline())
+
+    def close(self):
+        self._file.close()
+
+    def remove(self):
+        self.close()
+        os.remove(self.path)
+
+class StageTimer:
+    """Per-stage item counts, busy time and wall time (first start to last finish) for the pipeline."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stats = self.stages.setdefault(name, {"items": 0, "busy": 0.0, "first": start, "last": end})
+            stats["items"] += 1
+            stats["busy"] += end - start
+            stats["first"] = min(stats["first"], start)
+            stats["last"] = max(stats["last"], end)
+
+    def report(self, total):
+        print("⏱️ Stage timings:")
+        for name, stats in self.stages.items():
+            print(f"  {name:<16} {stats['items']:>4} items  wall {stats['last'] - stats['first']:6.1f}s  "
+                  f"busy {stats['busy']:6.1f}s")
+        print(f"  {'end-to-end':<16} {'':>10}  wall {total:6.1f}s")
+
+async def crawl_pipeline(previous, sink):
+    """Fetch, parse, classify and embed the catalog as one asyncio pipeline.
+
+    Listing pages for both catalog types are fetched concurrently, and each parsed listing page feeds
+    its rows straight into the detail stage. Stages are connected by bounded queues, and every request
+    to the SHL site shares one per-host concurrency limit. Blocking work (requests, BeautifulSoup,
+    Gemini calls) runs in worker threads. Finished assessments are appended to sink and dropped from
+    memory; URLs the sink already holds are skipped. Returns every listed URL in listing order.
+    """
+    timer = StageTimer()
+    started = time.perf_counter()
+    shl_limit = asyncio.Semaphore(SHL_MAX_CONCURRENCY)
+    detail_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    classify_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    embed_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    classify_slots = asyncio.Semaphore(CLASSIFY_WORKERS)
+    classify_requests = []
+    listed = []
+    queued = set()
+    statuses = {}
+
+    async def listing_page(type_order, type_param, page_start, label):
         url = f"{BASE_URL}?start={page_start}&type={type_param}"
-        response = requests.get(url, headers=HEADERS)
+        try:
+            with timer.stage("fetch listings"):
+                async with shl_limit:
+                    response = await asyncio.to_thread(http_client.get, url, headers=HEADERS)
+        except Exception as e:
+            print(f"[{label}] Failed to fetch {url}: {e}")
+            return
         if response.status_code != 200:
             print(f"[{label}] Failed to fetch {url}: {response.status_code}")
-            break
+            return
+        with timer.stage("parse listings"):
+            soup = await asyncio.to_thread(BeautifulSoup, response.content, "html.parser")
+            table = soup.find("table")
+            assessments = scrape_table(table) if table else []
+        if assessments:
+            print(f"[{label}] Scraped {url}: {len(assessments)} assessments")
+        for row, assessment in enumerate(assessments):
+            listed.append(((type_order, page_start, row), assessment["url"]))
+            # Each URL is processed once per crawl, and not at all if a resumed sink already has it
+            if assessment["url"] in queued or sink.done(assessment["url"]):
+                continue
+            queued.add(assessment["url"])
+            await detail_queue.put(assessment)
 
-        soup = BeautifulSoup(response.content, "html.parser")
-        print(f"[{label}] Scraping: {url}")
+    async def detail_worker():
+        while (assessment := await detail_queue.get()) is not None:
+            stored = previous.get(assessment["url"])
+            try:
+                with timer.stage("fetch details"):
+                    async with shl_limit:
+                        response = await asyncio.to_thread(request_detail_page, assessment["url"], stored)
+            except Exception as e:
+                print(f"Error fetching details for {assessment['url']}: {e}")
+                statuses[assessment["url"]] = mark_detail_error(assessment, stored)
+            else:
+                with timer.stage("parse details"):
+                    statuses[assessment["url"]] = await asyncio.to_thread(apply_detail_page, assessment, response, stored)
+            await classify_queue.put(assessment)
 
-        table = soup.find("table")
-        if not table:
-            print(f"[{label}] No table found, stopping.")
-            break
+    async def classify_batch(batch):
+        try:
+            with timer.stage("classify"):
+                classify_requests.append(await asyncio.to_thread(classify_assessments, batch))
+        finally:
+            classify_slots.release()
+        for assessment in batch:
+            await embed_queue.put(assessment)
 
-        assessments = scrape_table(table)
-        if not assessments:
-            print(f"[{label}] No assessments found, stopping.")
-            break
+    async def classify_stage():
+        batch = []
+        running = []
+        done = False
+        while not done:
+            # Like the embed stage: flush on a full batch, or once the upstream stages go quiet
+            try:
+                assessment = await asyncio.wait_for(classify_queue.get(), timeout=EMBED_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                assessment = False
+            if assessment is None:
+                done = True
+            elif assessment:
+                if statuses[assessment["url"]] in ("added", "changed") and needs_classification(assessment):
+                    batch.append(assessment)
+                else:
+                    await embed_queue.put(assessment)
+            if batch and (done or assessment is False or len(batch) >= CLASSIFY_BATCH_SIZE):
+                await classify_slots.acquire()
+                running.append(asyncio.create_task(classify_batch(batch)))
+                batch = []
+        await asyncio.gather(*running)
 
-        all_assessments.extend(assessments)
-        time.sleep(1)  # Respect server
+    def finish(assessment):
+        with timer.stage("write"):
+            sink.write(assessment, final_status(assessment, statuses.pop(assessment["url"]), previous))
 
-    return all_assessments
+    async def embed_stage():
+        batch = []
+        done = False
+        while not done:
+            # Flush on a full batch, or once the upstream stages go quiet for a moment
+            try:
+                assessment = await asyncio.wait_for(embed_queue.get(), timeout=EMBED_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                assessment = False
+            if assessment is None:
+                done = True
+            elif assessment:
+                if assessment["description"] != "N/A" and not assessment["embedding"]:
+                    batch.append(assessment)
+                else:
+                    finish(assessment)
+            if batch and (done or assessment is False or len(batch) >= GEMINI_EMBED_BATCH_SIZE):
+                with timer.stage("embed"):
+                    embeddings = await asyncio.to_thread(embedder.embed_many, [a["description"] for a in batch])
+                for pending, embedding in zip(batch, embeddings):
+                    pending["embedding"] = embedding
+                    finish(pending)
+                batch = []
 
-def scrape_shl_catalog():
-    """Main function to scrape the SHL catalog."""
-    print("⚠️ Ensure scraping complies with https://www.shl.com/robots.txt")
+    detail_workers = [asyncio.create_task(detail_worker()) for _ in range(SHL_MAX_CONCURRENCY)]
+    classify_task = asyncio.create_task(classify_stage())
+    embed_task = asyncio.create_task(embed_stage())
 
-    print("🔍 Scraping Pre-packaged Job Solutions...")
-    prepackaged = scrape_pages_for_type(type_param=2, max_pages=12, label="Prepackaged")
+    print("🔍 Scraping Pre-packaged and Individual Test Solutions concurrently...")
+    await asyncio.gather(*(
+        listing_page(type_order, type_param, page_start, label)
+        for type_order, (type_param, max_pages, label) in enumerate(CATALOG_TYPES)
+        for page_start in range(0, max_pages * 12, 12)
+    ))
+    print(f"Found {len(listed)} assessments ({len(queued)} to process). Waiting for detail, classify and embed stages...")
 
-    print("🔍 Scraping Individual Test Solutions...")
-    individual = scrape_pages_for_type(type_param=1, max_pages=32, label="Individual")
+    for _ in detail_workers:
+        await detail_queue.put(None)
+    await asyncio.gather(*detail_workers)
+    await classify_queue.put(None)
+    await classify_task
+    await embed_queue.put(None)
+    await embed_task
 
-    all_assessments = prepackaged + individual
-    
-    print(f"Found {len(all_assessments)} assessments. Fetching details...")
-    
-    # Fetch details in parallel, respecting Gemini free tier limits
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_assessment = {executor.submit(fetch_assessment_details, assessment): assessment 
-                               for assessment in all_assessments}
-        completed = 0
-        for future in as_completed(future_to_assessment):
-            completed += 1
-            if completed % 10 == 0:
-                print(f"Progress: {completed}/{len(all_assessments)} assessments processed")
-    
-    # Convert embeddings to string for CSV
-    for assessment in all_assessments:
-        assessment["embedding"] = json.dumps(assessment["embedding"])
+    timer.report(time.perf_counter() - started)
+    print(f"Classification: {classification_cache.stats()['hits']} descriptions from cache, "
+          f"{sum(classify_requests)} Gemini requests")
+    listed.sort(key=lambda item: item[0])
+    return [url for _, url in listed]
+
+def scrape_shl_catalog(incremental=False, dataset_path="shl_assessments.csv", resume=False):
+    """Main function to scrape the SHL catalog.
+
+    Each finished assessment is appended to a JSONL checkpoint next to dataset_path; with resume=True
+    a previous interrupted run's checkpoint is reused and its URLs are skipped. With incremental=True
+    the existing dataset is loaded and only new or changed detail pages are re-classified and
+    re-embedded; rows that disappeared from the listings are dropped.
+    Returns (sink, listed URLs in order) for save_to_csv and save_durations.
+    """
+    print("⚠️ Ensure scraping complies with https://www.shl.com/robots.txt")
+    previous = load_previous_dataset(dataset_path) if incremental else {}
+    sink = CrawlSink(checkpoint_path(dataset_path), resume=resume)
+
+    urls = asyncio.run(crawl_pipeline(previous, sink))
     
-    df = pd.DataFrame(all_assessments)
-    return df
-
-def save_to_csv(df, filename="shl_assessments.csv"):
-    """Save DataFrame to CSV."""
-    if df is not None and not df.empty:
-        df.to_csv(filename, index=False)
-        print(f"✅ Saved {len(df)} assessments to {filename}")
+    if incremental:
+        print_crawl_report(urls, sink.statuses, previous)
+    return sink, urls
+
+def checkpoint_path(dataset_path):
+    return os.path.splitext(dataset_path)[0] + ".partial.jsonl"
+
+def save_durations(sink, urls, path="shl_durations.json"):
+    """Seed the duration store with the durations resolved during the crawl."""
+    store = DurationStore(path)
+    fetched_at = time.time()
+    count = 0
+    for record in sink.records(dict.fromkeys(urls)):
+        store.set(record["url"], record["duration"], fetched_at)
+        count += 1
+    if count:
+        store.save()
+        print(f"✅ Saved {count} durations to {path}")
+
+def save_to_csv(sink, urls, filename="shl_assessments.csv"):
+    """Stream checkpointed records to CSV in listing order, replacing filename atomically."""
+    tmp_path = filename + ".tmp"
+    count = 0
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=DATASET_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for record in sink.records(urls):
+            # Embeddings are stored as JSON text in the CSV
+            record["embedding"] = json.dumps(record["embedding"])
+            writer.writerow(record)
+            count += 1
+    if count:
+        os.replace(tmp_path, filename)
+        print(f"✅ Saved {count} assessments to {filename}")
     else:
+        os.remove(tmp_path)
         print("❌ No data to save")
+    return count
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape the SHL product catalog into shl_assessments.csv.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse stored rows for unchanged detail pages and only process new or changed ones")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted crawl, skipping assessments already in its checkpoint")
+    args = parser.parse_args()
+
     print("🚀 Starting SHL catalog scrape...")
-    df = scrape_shl_catalog()
-    save_to_csv(df)
+    sink, urls = scrape_shl_catalog(incremental=args.incremental, resume=args.resume)
+    if save_to_csv(sink, urls):
+        save_durations(sink, urls)
+        sink.remove()  # The run is complete; the next crawl starts from a fresh checkpoint
@@ -0,0 +1,50 @@
+import math
+import time
+
+MIN_STAGE_TIMEOUT = 0.05  # Never hand a network call a zero or negative timeout
+
+
+class Deadline:
+    """Per-request time budget shared by every stage of the recommendation pipeline.
+
+    Deadline(None) is unbounded: remaining() is None and timeout(cap) returns cap unchanged, so
+    stages can take a deadline unconditionally. Stages record what they skipped or cut short with
+    degrade(stage), and callers report the result as partial.
+    """
+
+    def __init__(self, budget_ms=None):
+        self.budget_ms = budget_ms
+        self.expires_at = None if budget_ms is None else time.monotonic() + budget_ms / 1000
+        self.degraded = []
+
+    @classmethod
+    def from_ms(cls, budget_ms):
+        """Deadline from an optional, possibly string-valued millisecond budget; raises ValueError if invalid."""
+        if budget_ms is None:
+            return cls()
+        if isinstance(budget_ms, bool):
+            raise ValueError("deadline_ms must be a number, not a boolean")
+        budget_ms = float(budget_ms)
+        if not math.isfinite(budget_ms) or budget_ms <= 0:
+            raise ValueError("deadline_ms must be a positive, finite number")
+        return cls(budget_ms)
+
+    def remaining(self):
+        """Seconds left, or None when there is no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, cap):
+        """Timeout for one stage: cap, shortened to the remaining budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return max(MIN_STAGE_TIMEOUT, min(cap, remaining))
+
+    def degrade(self, stage):
+        if stage not in self.degraded:
+            self.degraded.append(stage)
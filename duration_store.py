@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_DURATION_STORE_PATH = "shl_durations.json"
+DURATION_TTL_SECONDS = 7 * 24 * 3600
+MISSING_DURATION_TTL_SECONDS = 24 * 3600  # "N/A" results are retried sooner
+CHANGE_LOG_SIZE = 4096  # Recent set() calls kept so derived indexes can update instead of rebuilding
+DURATION_PATTERN = re.compile(r"Approximate Completion Time in minutes = (\d+)", re.IGNORECASE)
+
+
+def parse_duration(soup):
+    """Extract "<n> minutes" from the "Assessment length" section of a detail page, or "N/A"."""
+    duration_section = soup.find("h4", string="Assessment length")
+    if duration_section:
+        duration_p = duration_section.find_next("p")
+        if duration_p:
+            duration_match = DURATION_PATTERN.search(duration_p.get_text())
+            if duration_match:
+                return f"{duration_match.group(1)} minutes"
+    return "N/A"
+
+
+class DurationStore:
+    """Per-URL assessment durations kept in memory, persisted to JSON and refreshed in the background.
+
+    Reads never block on the network: get() answers from memory and, when the entry is missing or
+    older than its TTL, hands the URL to a small worker pool that calls fetcher(url) and saves.
+    """
+
+    def __init__(self, path=DEFAULT_DURATION_STORE_PATH, fetcher=None, ttl=DURATION_TTL_SECONDS,
+                 missing_ttl=MISSING_DURATION_TTL_SECONDS, max_workers=2):
+        self.path = path
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._inflight = {}  # url -> Future of the running refresh
+        self._executor = None
+        self._entries = self._read()
+        self.version = 0  # Bumped on every set(), so derived indexes know when to rebuild
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)  # (version, url) of recent set() calls
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Atomically write the store to disk."""
+        with self._lock:
+            snapshot = dict(self._entries)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def set(self, url, duration, fetched_at=None):
+        with self._lock:
+            self._entries[url] = {"duration": duration, "fetched_at": fetched_at or time.time()}
+            self.version += 1
+            self._changes.append((self.version, url))
+
+    def changed_since(self, version):
+        """(URLs set after version, current version). The URLs are None when the change log no
+        longer reaches back to version (or version is None), so the caller must rebuild in full."""
+        with self._lock:
+            if version is None or not self.version - len(self._changes) <= version <= self.version:
+                return None, self.version
+            return {url for v, url in self._changes if v > version}, self.version
+
+    def is_fresh(self, url, now=None):
+        entry = self._entries.get(url)
+        if entry is None:
+            return False
+        ttl = self.missing_ttl if entry["duration"] == "N/A" else self.ttl
+        return (now or time.time()) - entry["fetched_at"] < ttl
+
+    def get(self, url, default="N/A"):
+        """Return the stored duration immediately, scheduling a background refresh if stale or missing."""
+        entry = self._entries.get(url)
+        if not self.is_fresh(url):
+            self._schedule(url)
+        if entry is None or entry["duration"] == "N/A":
+            return default or "N/A"
+        return entry["duration"]
+
+    def peek(self, url, default="N/A"):
+        """Like get(), but never schedules a refresh."""
+        entry = self._entries.get(url)
+        if entry is None or entry["duration"] == "N/A":
+            return default or "N/A"
+        return entry["duration"]
+
+    def refresh(self, url):
+        """Fetch one URL synchronously and persist the result."""
+        try:
+            duration = self.fetcher(url)
+        except Exception as e:
+            print(f"Error refreshing duration for {url}: {e}")
+            duration = "N/A"
+        self.set(url, duration)
+        self.save()
+        return duration
+
+    def refresh_stale(self, urls):
+        """Synchronously refresh every URL that is missing or past its TTL."""
+        stale = [url for url in urls if not self.is_fresh(url)]
+        for url in stale:
+            self.refresh(url)
+        return len(stale)
+
+    def resolve(self, url):
+        """Future for the URL's duration: already done when fresh, otherwise the shared background refresh."""
+        future = None if self.is_fresh(url) else self._schedule(url)
+        if future is None:
+            future = Future()
+            entry = self._entries.get(url)
+            future.set_result(entry["duration"] if entry else "N/A")
+        return future
+
+    def _schedule(self, url):
+        if self.fetcher is None:
+            return None
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="duration-refresh")
+                future = self._inflight[url] = self._executor.submit(self._run_refresh, url)
+        return future
+
+    def _run_refresh(self, url):
+        try:
+            return self.refresh(url)
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+
+if __name__ == "__main__":
+    from catalog_index import load_catalog
+    from recommenderRender import fetch_duration
+
+    store = DurationStore(fetcher=fetch_duration)
+    urls = [row["url"] for row in load_catalog().metadata]
+    refreshed = store.refresh_stale(urls)
+    print(f"✅ Refreshed {refreshed} of {len(urls)} durations in {store.path}")
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+import http_client
+
+# Embedder the crawler (and python embedder.py) embeds the catalog with. Serving always embeds
+# queries with the embedder recorded in the catalog index, so the two can never disagree.
+EMBEDDER = os.getenv("EMBEDDER", "gemini")
+DEFAULT_EMBEDDER = "gemini:text-embedding-004"  # Catalogs built before embedders were recorded
+
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_EMBEDDING_MODEL = "text-embedding-004"
+GEMINI_BATCH_LIMIT = 100  # Max requests per batchEmbedContents call
+GEMINI_BATCH_CONCURRENCY = 4  # batchEmbedContents calls in flight when there are more texts than that
+GEMINI_EMBED_TIMEOUT = 10  # Seconds allowed for one embedContent call
+
+LOCAL_EMBEDDING_DIM = 768
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")  # Keeps "c++" and "c#" whole
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to
+we will with you your who what which within work working
+""".split())
+
+_embedders = {}
+
+
+class GeminiEmbedder:
+    """Remote embeddings from the Gemini API: embedContent for one text, batchEmbedContents for many.
+
+    Failed calls are logged and yield [] for the texts they covered. limiter, when given, is a
+    rate_limiter.TokenBucket acquired before every API call.
+    """
+
+    remote = True
+
+    def __init__(self, model=GEMINI_EMBEDDING_MODEL, api_key=None, api_base=GEMINI_API_BASE, limiter=None):
+        self.model = model
+        self.name = f"gemini:{model}"
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY", "")
+        self.api_base = api_base
+        self.limiter = limiter
+
+    def _url(self, method):
+        return f"{self.api_base}/models/{self.model}:{method}?key={self.api_key}"
+
+    def embed(self, text, timeout=GEMINI_EMBED_TIMEOUT, retry=True):
+        """Embedding of one text, or [] on failure."""
+        try:
+            data = {"model": f"models/{self.model}", "content": {"parts": [{"text": text}]}}
+            if self.limiter:
+                self.limiter.acquire()
+            response = http_client.post(self._url("embedContent"), json=data,
+                                        headers={"Content-Type": "application/json"}, timeout=timeout, retry=retry)
+            response.raise_for_status()
+            return response.json()["embedding"]["values"]
+        except Exception as e:
+            print(f"Error generating embedding: {e}")
+            return []
+
+    def embed_many(self, texts, timeout=GEMINI_EMBED_TIMEOUT, retry=True):
+        """Embeddings of texts in order, GEMINI_BATCH_LIMIT per call with several calls in flight."""
+        def request_batch(batch):
+            try:
+                data = {
+                    "requests": [
+                        {"model": f"models/{self.model}", "content": {"parts": [{"text": text}]}}
+                        for text in batch
+                    ]
+                }
+                if self.limiter:
+                    self.limiter.acquire()
+                response = http_client.post(self._url("batchEmbedContents"), json=data,
+                                            headers={"Content-Type": "application/json"}, timeout=timeout, retry=retry)
+                response.raise_for_status()
+                return [item["values"] for item in response.json()["embeddings"]]
+            except Exception as e:
+                print(f"Error generating batch embeddings: {e}")
+                return [[] for _ in batch]
+
+        batches = [texts[start:start + GEMINI_BATCH_LIMIT] for start in range(0, len(texts), GEMINI_BATCH_LIMIT)]
+        if len(batches) <= 1:
+            return request_batch(batches[0]) if batches else []
+        with ThreadPoolExecutor(max_workers=GEMINI_BATCH_CONCURRENCY) as pool:
+            return [embedding for result in pool.map(request_batch, batches) for embedding in result]
+
+
+@lru_cache(maxsize=1 << 16)
+def _hashed_feature(feature, dim):
+    # crc32 is stable across processes, unlike hash(); the top bit picks the sign
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, 1.0 if h & 0x80000000 else -1.0
+
+
+class HashingEmbedder:
+    """Local embeddings: signed feature hashing of word unigrams and bigrams, in process, no network.
+
+    Term counts are log-scaled (1 + log tf) and each vector is L2-normalized, so cosine similarity
+    works like TF-IDF cosine over a vocabulary that never has to be fitted or shipped: the crawler and
+    every server produce the same vector for the same text. Stopwords are dropped.
+    """
+
+    remote = False
+
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def embed(self, text, timeout=None, retry=True):
+        tokens = [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+        counts = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in counts.items():
+            index, sign = _hashed_feature(feature, self.dim)
+            vector[index] += sign * (1.0 + np.log(count))
+        norm = np.linalg.norm(vector)
+        return (vector / norm).tolist() if norm else []
+
+    def embed_many(self, texts, timeout=None, retry=True):
+        return [self.embed(text) for text in texts]
+
+
+class FakeEmbedder:
+    """Deterministic random unit vectors seeded by the text's hash, for tests and benchmarks."""
+
+    remote = False
+
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"fake:{dim}"
+
+    def embed(self, text, timeout=None, retry=True):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+    def embed_many(self, texts, timeout=None, retry=True):
+        return [self.embed(text) for text in texts]
+
+
+def get_embedder(name=None, api_key=None, limiter=None):
+    """Process-wide embedder for a name such as "gemini", "gemini:text-embedding-004", "hashing",
+    "hashing:1024" or "fake", shared by callers passing the same api_key and limiter. Defaults to
+    EMBEDDER. Raises ValueError for an unknown kind."""
+    name = name or EMBEDDER
+    kind, _, arg = name.partition(":")
+    if kind == "gemini":
+        embedder = GeminiEmbedder(arg or GEMINI_EMBEDDING_MODEL, api_key=api_key, limiter=limiter)
+    elif kind == "hashing":
+        embedder = HashingEmbedder(int(arg or LOCAL_EMBEDDING_DIM))
+    elif kind == "fake":
+        embedder = FakeEmbedder(int(arg or LOCAL_EMBEDDING_DIM))
+    else:
+        raise ValueError(f"Unknown embedder: {name}")
+    # Instances are shared per canonical name, so "gemini" and "gemini:text-embedding-004" are one.
+    # The key and limiter are part of the identity: a caller's quota must not be swapped for another's.
+    return _embedders.setdefault((embedder.name, getattr(embedder, "api_key", None), limiter), embedder)
+
+
+def reembed_dataset(dataset_path, name=None, output_path=None):
+    """Re-embed every description of a catalog CSV with another embedder, e.g. to serve on CPU only.
+
+    Rewrites the embedding and embedder columns and replaces output_path (default: the input) atomically.
+    """
+    import pandas as pd
+
+    embedder = get_embedder(name)
+    df = pd.read_csv(dataset_path)
+    described = df["description"].notna() & (df["description"] != "N/A")
+    texts = df.loc[described, "description"].astype(str).tolist()
+    embeddings = embedder.embed_many(texts)
+    df["embedding"] = "[]"
+    df.loc[described, "embedding"] = [json.dumps(e) for e in embeddings]
+    df["embedder"] = embedder.name
+    output_path = output_path or dataset_path
+    tmp_path = output_path + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    print(f"✅ Re-embedded {sum(1 for e in embeddings if e)}/{len(texts)} descriptions with {embedder.name} "
+          f"into {output_path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-embed a catalog CSV with another embedder.")
+    parser.add_argument("dataset_path", nargs="?", default="shl_assessments.csv")
+    parser.add_argument("--embedder", default=EMBEDDER, help='e.g. "hashing", "hashing:1024" or "gemini"')
+    parser.add_argument("--output", default=None, help="Write to this CSV instead of replacing the input")
+    args = parser.parse_args()
+    reembed_dataset(args.dataset_path, args.embedder, args.output)
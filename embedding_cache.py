@@ -0,0 +1,158 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_EMBEDDING_CACHE_PATH = "embedding_cache.sqlite3"
+MEMORY_MAX_ENTRIES = 1024
+MEMORY_TTL_SECONDS = 3600
+DISK_TTL_SECONDS = 30 * 24 * 3600
+
+
+def cache_key(text, model):
+    """Hash of whitespace-normalized text plus the embedding model name."""
+    normalized = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier query embedding cache: an in-process LRU in front of a shared SQLite file.
+
+    The SQLite tier survives restarts and is shared by every worker pointing at the same path.
+    Only non-empty embeddings are cached, so API failures are retried on the next call.
+    """
+
+    def __init__(self, path=DEFAULT_EMBEDDING_CACHE_PATH, max_entries=MEMORY_MAX_ENTRIES,
+                 memory_ttl=MEMORY_TTL_SECONDS, disk_ttl=DISK_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_ttl = memory_ttl
+        self.disk_ttl = disk_ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # Memory tier and counters
+        self._disk_lock = threading.Lock()  # SQLite connection
+        self._conn = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _db(self):
+        if self._conn is None and self.path:
+            try:
+                conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"Embedding cache disk tier disabled: {e}")
+                self.path = None
+        return self._conn
+
+    def _get_memory(self, key, now):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        embedding, stored_at = entry
+        if now - stored_at >= self.memory_ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return embedding
+
+    def _put_memory(self, key, embedding, now):
+        self._memory[key] = (embedding, now)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_disk(self, key, now):
+        conn = self._db()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT embedding, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading embedding cache: {e}")
+            return None
+        if row is None or now - row[1] >= self.disk_ttl:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _put_disk(self, key, embedding, now):
+        conn = self._db()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, created_at) VALUES (?, ?, ?)",
+                (key, np.asarray(embedding, dtype=np.float32).tobytes(), now),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing embedding cache: {e}")
+
+    def get(self, text, model):
+        """Return the cached embedding for text, or None on a miss in both tiers."""
+        key = cache_key(text, model)
+        now = time.time()
+        with self._lock:
+            embedding = self._get_memory(key, now)
+            if embedding is not None:
+                self._counters["memory_hits"] += 1
+                return embedding
+        # Read SQLite without holding the memory lock, so memory hits never queue behind disk reads
+        with self._disk_lock:
+            embedding = self._get_disk(key, now)
+        with self._lock:
+            if embedding is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._put_memory(key, embedding, now)
+        return embedding
+
+    def put(self, text, model, embedding):
+        if not embedding:
+            return
+        key = cache_key(text, model)
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, embedding, now)
+        with self._disk_lock:
+            self._put_disk(key, embedding, now)
+
+    def get_or_compute(self, text, model, compute):
+        """Return the cached embedding, calling compute(text) and caching the result on a miss."""
+        embedding = self.get(text, model)
+        if embedding is None:
+            embedding = compute(text)
+            self.put(text, model, embedding)
+        return embedding
+
+    def get_or_compute_many(self, texts, model, compute_many):
+        """Batch variant: only the misses are passed to compute_many(texts), in a single call."""
+        embeddings = [self.get(text, model) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = compute_many([texts[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+                self.put(texts[i], model, embedding)
+        return embeddings
+
+    def stats(self):
+        """Hit/miss counters and current memory tier size."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,177 @@
+import threading
+
+import numpy as np
+
+# Categorical catalog columns compiled into bitmaps; test_type cells list several types
+BITMAP_COLUMNS = ["test_type", "remote_support", "adaptive_support"]
+MULTI_VALUE_SEPARATOR = ", "
+
+
+def parse_minutes(duration):
+    """Whole minutes from a "<n> minutes" duration, or None when unknown."""
+    if isinstance(duration, str) and "minutes" in duration.lower():
+        try:
+            return int(duration.split()[0])
+        except ValueError:
+            return None
+    return None
+
+
+def _yes_no(value, name):
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, str) and value.strip().lower() in ("yes", "no"):
+        return value.strip().lower()
+    raise ValueError(f"{name} must be true/false or \"yes\"/\"no\"")
+
+
+def _minutes(value, name):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"{name} must be a non-negative number of minutes")
+    return value
+
+
+def parse_filters(filters):
+    """Validate a filter dict and return it in canonical form (None when it filters nothing).
+
+    Accepted keys: test_type (one name or a list, case-insensitive; rows matching any of them pass),
+    remote_support and adaptive_support (true/false or "yes"/"no"), and min_duration /
+    max_duration in minutes (rows with an unknown duration never pass a duration bound).
+    Raises ValueError on unknown keys or invalid values. Parsing is idempotent.
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    unknown = set(filters) - {"test_type", "remote_support", "adaptive_support", "min_duration", "max_duration"}
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    parsed = {}
+    test_types = filters.get("test_type")
+    if test_types:
+        if isinstance(test_types, str):
+            test_types = [test_types]
+        if not isinstance(test_types, (list, tuple)) or not all(isinstance(t, str) for t in test_types):
+            raise ValueError("test_type must be a name or a list of names")
+        parsed["test_type"] = tuple(sorted({t.strip().lower() for t in test_types}))
+    for column in ("remote_support", "adaptive_support"):
+        if filters.get(column) is not None:
+            parsed[column] = _yes_no(filters[column], column)
+    for bound in ("min_duration", "max_duration"):
+        if filters.get(bound) is not None:
+            parsed[bound] = _minutes(filters[bound], bound)
+    return parsed or None
+
+
+def filters_key(filters):
+    """Hashable form of parsed filters, for coalescing and cache keys."""
+    return tuple(sorted(filters.items())) if filters else ()
+
+
+class FilterIndex:
+    """Bitmap indexes over the categorical catalog columns and a sorted index over duration.
+
+    Bitmaps are boolean row masks per column value, so a filter is a few vectorized ANDs/ORs, and
+    duration bounds are two binary searches over rows sorted by minutes. rows(filters) returns the
+    catalog positions that pass, which are the only rows handed to the vector index for scoring.
+    """
+
+    def __init__(self, metadata):
+        self.size = len(metadata)
+        self.bitmaps = {}
+        self.labels = {}  # Bitmap key (lowercased value) -> value as first spelled in the catalog
+        for column in BITMAP_COLUMNS:
+            positions = {}
+            labels = self.labels[column] = {}
+            for i, row in enumerate(metadata):
+                value = row.get(column)
+                if not isinstance(value, str):
+                    continue
+                values = value.split(MULTI_VALUE_SEPARATOR) if column == "test_type" else [value]
+                for v in values:
+                    key = v.strip().lower()
+                    labels.setdefault(key, v.strip())
+                    positions.setdefault(key, []).append(i)
+            bitmaps = {}
+            for key, rows in positions.items():
+                bitmaps[key] = np.zeros(self.size, dtype=bool)
+                bitmaps[key][rows] = True
+            self.bitmaps[column] = bitmaps
+        self.positions = {}  # url -> catalog positions, for updating single rows' durations
+        for i, row in enumerate(metadata):
+            self.positions.setdefault(row.get("url"), []).append(i)
+        self._durations = None
+        self._durations_lock = threading.Lock()
+        self.durations_version = None
+        self.set_durations([row.get("duration") for row in metadata])
+
+    def values(self, column):
+        """Distinct values of a bitmap column as spelled in the catalog, sorted."""
+        return sorted(self.labels[column].values())
+
+    def set_durations(self, durations, version=None):
+        """Rebuild the sorted duration index from one "<n> minutes" (or unknown) value per row."""
+        minutes = np.array([np.nan if m is None else m for m in map(parse_minutes, durations)], dtype=np.float64)
+        known = np.flatnonzero(~np.isnan(minutes))
+        order = known[np.argsort(minutes[known], kind="stable")]
+        # Swapped in as one tuple so concurrent readers never see a half-built index
+        with self._durations_lock:
+            self._durations = (order, minutes[order])
+            self.durations_version = version
+
+    def update_durations(self, durations, version):
+        """Change the duration of a few rows ({position: duration}) without re-sorting the rest.
+
+        Changed rows are dropped from the sorted index and reinserted at their binary-searched
+        places, so the cost is a few array copies rather than a pass over every catalog row.
+        """
+        positions = np.fromiter(durations, dtype=np.int64, count=len(durations))
+        minutes = np.array([np.nan if m is None else m for m in map(parse_minutes, durations.values())],
+                           dtype=np.float64)
+        known = ~np.isnan(minutes)
+        new_order = np.argsort(minutes[known], kind="stable")
+        new_positions, new_minutes = positions[known][new_order], minutes[known][new_order]
+        with self._durations_lock:
+            order, sorted_minutes = self._durations
+            keep = ~np.isin(order, positions)
+            order, sorted_minutes = order[keep], sorted_minutes[keep]
+            at = np.searchsorted(sorted_minutes, new_minutes, side="right")
+            self._durations = (np.insert(order, at, new_positions), np.insert(sorted_minutes, at, new_minutes))
+            self.durations_version = version
+
+    def mask(self, filters):
+        """Boolean mask of rows passing parsed filters, or None when nothing is filtered."""
+        if not filters:
+            return None
+        mask = np.ones(self.size, dtype=bool)
+        for column in BITMAP_COLUMNS:
+            wanted = filters.get(column)
+            if not wanted:
+                continue
+            if isinstance(wanted, str):
+                wanted = (wanted,)
+            column_mask = np.zeros(self.size, dtype=bool)
+            for value in wanted:
+                bitmap = self.bitmaps[column].get(value)
+                if bitmap is not None:
+                    column_mask |= bitmap
+            mask &= column_mask
+        if "min_duration" in filters or "max_duration" in filters:
+            order, sorted_minutes = self._durations
+            lo = np.searchsorted(sorted_minutes, filters.get("min_duration", -np.inf), side="left")
+            hi = np.searchsorted(sorted_minutes, filters.get("max_duration", np.inf), side="right")
+            duration_mask = np.zeros(self.size, dtype=bool)
+            duration_mask[order[lo:hi]] = True
+            mask &= duration_mask
+        return mask
+
+    def rows(self, filters):
+        """Sorted catalog positions that pass parsed filters, or None when nothing is filtered."""
+        mask = self.mask(filters)
+        return None if mask is None else np.flatnonzero(mask)
+
+
+def load_filter_index(catalog):
+    """Return the filter index cached on a catalog, compiling it on first use."""
+    return catalog.derived("filters", lambda: FilterIndex(catalog.metadata))
@@ -0,0 +1,13 @@
+# Production serving for api.py: gunicorn -c gunicorn.conf.py api:app
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Each request mostly waits on scraping and the embedding API, so threads are cheap concurrency.
+# Identical in-flight requests are coalesced per worker process, so prefer few workers, many threads.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
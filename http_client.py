@@ -0,0 +1,63 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Pool sizes, timeouts and retries can be tuned per deployment through the environment
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # Number of hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))  # Keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def _build_session(retry=True):
+    policy = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),  # Embedding and classification POSTs are idempotent
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the last response back so callers can raise_for_status()
+    ) if retry else Retry(total=0, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=policy)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(retry=True):
+    """Process-wide requests.Session with keep-alive connection pools per host and retry with backoff.
+
+    retry=False returns a second shared session that never retries, for calls under a deadline
+    where a backoff sleep would overrun the remaining budget.
+    """
+    session = _sessions.get(retry)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(retry)
+            if session is None:
+                session = _sessions[retry] = _build_session(retry)
+    return session
+
+
+def request(method, url, retry=True, **kwargs):
+    """Send a request through the shared session, applying the default timeout when none is given."""
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    return get_session(retry).request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,174 @@
+import os
+import re
+
+from lxml import etree
+
+# Job pages are read up to this many bytes; anything past it is never downloaded
+JOB_PAGE_MAX_BYTES = int(os.getenv("JOB_PAGE_MAX_BYTES", str(2 * 1024 * 1024)))
+CHUNK_BYTES = 64 * 1024
+MAX_DESCRIPTION_CHARS = 5000
+MIN_DESCRIPTION_CHARS = 200  # Less text than this from <p> tags triggers the <div>/<section> fallback
+
+JOB_KEYWORDS = [
+    "responsibilities", "duties", "qualifications", "requirements",
+    "skills", "experience", "role", "position", "overview", "description"
+]
+BOILERPLATE_PHRASES = ["apply now", "privacy policy", "equal opportunity", "cookie policy"]
+BLOCK_TAGS = {"div", "section"}
+SKIPPED_TAGS = {"script", "style", "template"}  # Never part of the visible text
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+class JobTextCollector:
+    """lxml parser target that collects job description text in a single walk of the page.
+
+    Only <p>, <div>, <section> and the tags whose text is invisible are looked at; every other tag
+    just passes its text through. Paragraph text is kept when it reads like job content. The text
+    of the first outermost <div>/<section> that mentions a job keyword is kept as the fallback for
+    pages without usable paragraphs; nested blocks only add to their outermost ancestor, so no
+    subtree is walked twice. done is set once enough paragraph text has been collected.
+    """
+
+    def __init__(self, max_chars=MAX_DESCRIPTION_CHARS):
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.paragraph_chars = 0  # Before whitespace is collapsed, as the fallback threshold counts it
+        self.description_chars = 0
+        self.block_text = None
+        self.done = False
+        self._pending = []  # Consecutive text callbacks of one text node
+        self._paragraph = None
+        self._paragraph_depth = 0
+        self._block = None
+        self._block_depth = 0
+        self._skip_depth = 0
+
+    def start(self, tag, attrib):
+        self._flush()
+        if self._skip_depth or tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "p":
+            if not self._paragraph_depth:
+                self._paragraph = []
+            self._paragraph_depth += 1
+        elif tag in BLOCK_TAGS and self.block_text is None:
+            if not self._block_depth:
+                self._block = []
+            self._block_depth += 1
+
+    def end(self, tag):
+        self._flush()
+        if self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "p" and self._paragraph_depth:
+            self._paragraph_depth -= 1
+            if not self._paragraph_depth:
+                self._add_paragraph("".join(self._paragraph))
+                self._paragraph = None
+        elif tag in BLOCK_TAGS and self._block_depth:
+            self._block_depth -= 1
+            if not self._block_depth:
+                text = "".join(self._block)
+                self._block = None
+                if len(text) > MIN_DESCRIPTION_CHARS and any(k in text.lower() for k in JOB_KEYWORDS):
+                    self.block_text = text
+
+    def data(self, text):
+        if not self._skip_depth:
+            self._pending.append(text)
+
+    def close(self):
+        self._flush()
+        return self
+
+    def _flush(self):
+        # Strip whole text nodes, like BeautifulSoup's get_text(strip=True), however lxml split them
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+        if self._paragraph is not None:
+            self._paragraph.append(text)
+        if self._block is not None:
+            self._block.append(text)
+
+    def _add_paragraph(self, text):
+        lowered = text.lower()
+        if len(text) < 50 or any(phrase in lowered for phrase in BOILERPLATE_PHRASES):
+            return
+        if len(text) > 100 or any(keyword in lowered for keyword in JOB_KEYWORDS):
+            self.paragraph_chars += len(text)
+            text = re.sub(r'\s+', ' ', text)
+            self.paragraphs.append(text)
+            self.description_chars += len(text) + 1
+            # The description is cut at max_chars, so later paragraphs cannot change it
+            if self.description_chars > self.max_chars:
+                self.done = True
+
+    def description(self):
+        """The extracted description, at most max_chars long, or None when nothing matched."""
+        parts = list(self.paragraphs)
+        if self.paragraph_chars < MIN_DESCRIPTION_CHARS and self.block_text:
+            sentences = (s.strip() for s in re.split(r'[.!?]+', self.block_text))
+            parts.extend(s for s in sentences if len(s) > 50)
+        if not parts:
+            return None
+        return re.sub(r'\s+', ' ', " ".join(parts)).strip()[:self.max_chars]
+
+
+def _page_encoding(head, declared=None):
+    """Charset from the Content-Type header, else a <meta> tag near the top of the page, else UTF-8."""
+    if declared:
+        return declared
+    match = META_CHARSET.search(head[:4096])
+    return match.group(1).decode("ascii") if match else "utf-8"
+
+
+def extract_job_description(chunks, encoding=None, should_stop=None, max_chars=MAX_DESCRIPTION_CHARS):
+    """Extract a job description from an iterable of HTML byte chunks, or None when nothing matched.
+
+    Chunks are fed to lxml's incremental HTML parser as they arrive, and reading stops as soon as
+    the collector has enough text or should_stop() returns true, so the rest of the page is never
+    parsed (or downloaded, when chunks come from a streamed response). encoding is the charset
+    declared by the server, if any.
+    """
+    collector = JobTextCollector(max_chars)
+    parser = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if parser is None:
+            parser = etree.HTMLParser(target=collector, encoding=_page_encoding(chunk, encoding),
+                                      remove_comments=True, remove_pis=True, huge_tree=True)
+        parser.feed(chunk)
+        if collector.done or (should_stop and should_stop()):
+            break
+    if parser is None:
+        return None
+    parser.close()
+    return collector.description()
+
+
+def declared_charset(response):
+    """Charset named in the response's Content-Type header, or None."""
+    for param in response.headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip("\"' ")
+    return None
+
+
+def read_limited(response, max_bytes=JOB_PAGE_MAX_BYTES, chunk_size=CHUNK_BYTES):
+    """Yield the body of a streamed response in chunks, stopping after max_bytes."""
+    remaining = max_bytes
+    try:
+        for chunk in response.iter_content(chunk_size):
+            yield chunk[:remaining]
+            remaining -= len(chunk)
+            if remaining <= 0:
+                print(f"Job page larger than {max_bytes} bytes; extracting from the first {max_bytes}")
+                break
+    finally:
+        response.close()
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from singleflight import SingleFlight
+
+JOB_PAGE_TTL_SECONDS = float(os.getenv("JOB_PAGE_TTL_SECONDS", "3600"))
+JOB_PAGE_NEGATIVE_TTL_SECONDS = float(os.getenv("JOB_PAGE_NEGATIVE_TTL_SECONDS", "300"))  # Failures are retried sooner
+JOB_PAGE_CACHE_MAX_ENTRIES = 2048
+# Query parameters that only track where a link was clicked; they never change the posting
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "trk", "trackingid", "refid"}
+
+
+def normalize_url(url):
+    """Cache key for a job URL: lowercase scheme and host, no fragment, default port or tracking
+    parameters, and the remaining query parameters sorted."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_"))
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class _Entry:
+    def __init__(self, description, etag, last_modified, checked_at):
+        self.description = description  # None for a cached failure
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at
+
+
+class JobPageCache:
+    """In-process cache of extracted job descriptions, keyed by normalized URL.
+
+    A description is served without touching the network for ttl seconds after it was last checked.
+    After that the page is revalidated with If-None-Match / If-Modified-Since, so an unchanged
+    posting costs a 304 instead of a download and re-parse. Failures are cached for negative_ttl.
+    Concurrent misses for one URL share a single fetch, so each URL is fetched at most once per
+    freshness window across all threads.
+    """
+
+    def __init__(self, ttl=JOB_PAGE_TTL_SECONDS, negative_ttl=JOB_PAGE_NEGATIVE_TTL_SECONDS,
+                 max_entries=JOB_PAGE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+        self._counters = {"hits": 0, "negative_hits": 0, "revalidated": 0, "fetches": 0}
+
+    def _fresh(self, entry, now):
+        ttl = self.ttl if entry.description is not None else self.negative_ttl
+        return now - entry.checked_at < ttl
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, url, fetch):
+        """Return the description for url, or None when the page could not be scraped.
+
+        fetch(etag, last_modified) does the conditional GET and returns (status, description, etag,
+        last_modified). Status 304 keeps the cached description. Any other status replaces it, with
+        description None when the request failed or nothing was extracted. Status None marks a
+        result that must not be cached, such as a page cut short by a request's deadline.
+        """
+        key = normalize_url(url)
+        entry = self._lookup(key)
+        if entry is not None and self._fresh(entry, time.time()):
+            with self._lock:
+                self._counters["hits" if entry.description is not None else "negative_hits"] += 1
+            return entry.description
+        return self._inflight.do(key, lambda: self._refresh(key, fetch))
+
+    def _refresh(self, key, fetch):
+        # Another thread may have refreshed the entry while this one waited to lead
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None and self._fresh(entry, now):
+            return entry.description
+        validators = (entry.etag, entry.last_modified) if entry is not None and entry.description else (None, None)
+        status, description, etag, last_modified = fetch(*validators)
+        now = time.time()
+        with self._lock:
+            self._counters["fetches"] += 1
+        if status is None:
+            return description
+        if status == 304 and entry is not None and entry.description:
+            with self._lock:
+                self._counters["revalidated"] += 1
+            self._store(key, _Entry(entry.description, etag or entry.etag, last_modified or entry.last_modified, now))
+            return entry.description
+        self._store(key, _Entry(description, etag, last_modified, now))
+        return description
+
+    def stats(self):
+        """Hit, revalidation and fetch counters, coalesced lookups and the current number of entries."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        stats["coalesced"] = self._inflight.stats()["coalesced"]
+        return stats
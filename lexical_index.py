@@ -0,0 +1,186 @@
+import os
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from scoring import top_k
+
+# Weight of the normalized BM25 score in the fused score; 0 ranks by embedding similarity alone
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.2"))
+HYBRID_CANDIDATES = 100  # Rows each side (vector and lexical) contributes to the fusion
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3  # A term in the assessment name counts as this many occurrences in its description
+# ".net", "c++" and "c#" stay whole; any other punctuation splits tokens
+TOKEN_PATTERN = re.compile(r"\.net\b|[a-z0-9]+[+#]*")
+STOPWORDS = frozenset("""
+a an and are as at be but by can for from has have how in into is it its of on or our that the
+their them they this to was we were will with you your
+""".split())
+
+# Written into every catalog version directory by catalog_index.py
+LEXICAL_TERMS_FILE = "lexical_terms.npy"
+LEXICAL_OFFSETS_FILE = "lexical_offsets.npy"
+LEXICAL_DOCS_FILE = "lexical_docs.npy"
+LEXICAL_WEIGHTS_FILE = "lexical_weights.npy"
+
+
+def terms(text):
+    """Index terms of text: lowercase word tokens without stopwords, plus each adjacent pair
+    ("java 8", "microsoft excel") so multi-word skill names also match as phrases."""
+    if not isinstance(text, str):
+        return []
+    tokens = [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+    return tokens + list(map(" ".join, zip(tokens, tokens[1:])))
+
+
+@lru_cache(maxsize=1 << 16)
+def term_key(term):
+    # Terms are kept as 32-bit hashes, so the vocabulary costs 4 bytes per term at any catalog size
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class LexicalIndex:
+    """BM25 inverted index over assessment names and descriptions.
+
+    Postings are stored as flat arrays grouped by term (CSR layout) with each posting's BM25 weight
+    precomputed, so a query is one binary search over the sorted term keys, one gather of the
+    matching postings and one bincount into per-row scores; there is no per-row Python work.
+    Names are weighted NAME_WEIGHT times, like a BM25F field boost. The index is compiled with
+    each catalog version and memory-mapped from its directory, so serving processes never build it.
+    """
+
+    def __init__(self, term_keys, offsets, docs, weights, size):
+        self.term_keys = term_keys
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.size = size
+
+    @classmethod
+    def build(cls, metadata, k1=BM25_K1, b=BM25_B, name_weight=NAME_WEIGHT):
+        """Index the name and description of every catalog row, in catalog order."""
+        size = len(metadata)
+        keys, docs, tfs = [], [], []
+        lengths = np.zeros(size, dtype=np.float32)
+        for i, row in enumerate(metadata):
+            counts = Counter(terms(row.get("description")))
+            for term in terms(row.get("name")):
+                counts[term] += name_weight
+            keys.extend(term_key(term) for term in counts)
+            docs.extend([i] * len(counts))
+            tfs.extend(counts.values())
+            lengths[i] = sum(counts.values())
+
+        keys = np.array(keys, dtype=np.uint32)
+        order = np.argsort(keys, kind="stable")
+        term_keys, starts, doc_freq = np.unique(keys[order], return_index=True, return_counts=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+        docs = np.array(docs, dtype=np.int32)[order]
+        tfs = np.array(tfs, dtype=np.float32)[order]
+
+        idf = np.log1p((size - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        avg_length = lengths.mean() if size else 1.0
+        norms = k1 * (1 - b + b * lengths[docs] / max(avg_length, 1e-9))
+        weights = (np.repeat(idf, doc_freq) * tfs * (k1 + 1) / (tfs + norms)).astype(np.float32)
+        return cls(term_keys, offsets, docs, weights, size)
+
+    def save(self, path):
+        np.save(os.path.join(path, LEXICAL_TERMS_FILE), self.term_keys)
+        np.save(os.path.join(path, LEXICAL_OFFSETS_FILE), self.offsets)
+        np.save(os.path.join(path, LEXICAL_DOCS_FILE), self.docs)
+        np.save(os.path.join(path, LEXICAL_WEIGHTS_FILE), self.weights)
+
+    @classmethod
+    def load(cls, path, size):
+        """Open an index saved in path, for a catalog of size rows, with the postings memory-mapped."""
+        return cls(
+            np.load(os.path.join(path, LEXICAL_TERMS_FILE)),
+            np.load(os.path.join(path, LEXICAL_OFFSETS_FILE)),
+            np.load(os.path.join(path, LEXICAL_DOCS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, LEXICAL_WEIGHTS_FILE), mmap_mode="r"),
+            size,
+        )
+
+    def __len__(self):
+        return self.size
+
+    def scores(self, text):
+        """BM25 score of every row for text; repeated query terms count once."""
+        keys = np.unique(np.array([term_key(t) for t in set(terms(text))], dtype=np.uint32))
+        positions = np.minimum(np.searchsorted(self.term_keys, keys), max(len(self.term_keys) - 1, 0))
+        found = positions[self.term_keys[positions] == keys] if len(self.term_keys) else positions[:0]
+        if not len(found):
+            return np.zeros(self.size, dtype=np.float64)
+        # Positions of every matching posting, gathered without a Python loop over terms
+        starts = self.offsets[found]
+        lengths = self.offsets[found + 1] - starts
+        postings = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.docs[postings], weights=self.weights[postings], minlength=self.size)
+
+    def search(self, text, k, rows=None):
+        """Top-k rows with any matching term, best first: (indices, scores), restricted to rows if given."""
+        return self.top(self.scores(text), k, rows)
+
+    @staticmethod
+    def top(scores, k, rows=None):
+        """Top-k rows with a positive score in a scores() array, best first: (indices, scores)."""
+        # Only matching rows are ranked: argpartition over a mostly-zero array is many times slower
+        candidates = np.flatnonzero(scores > 0) if rows is None else rows[scores[rows] > 0]
+        order = top_k(scores[candidates], k)
+        return candidates[order], scores[candidates[order]]
+
+
+def load_lexical_index(catalog):
+    """Return the lexical index cached on a catalog, opening it from the catalog version directory,
+    or compiling it in memory when the directory has none."""
+    def load():
+        try:
+            return LexicalIndex.load(catalog.index_dir, len(catalog))
+        except (OSError, TypeError):
+            return LexicalIndex.build(catalog.metadata)
+
+    return catalog.derived("lexical", load)
+
+
+def lexical_search(catalog, text, k, rows=None):
+    """Rank rows by BM25 alone, with scores scaled so the best match is 1.0.
+
+    This is the fallback when the query could not be embedded; rows sharing no term with text
+    are never returned.
+    """
+    indices, scores = load_lexical_index(catalog).search(text, k, rows)
+    return indices, scores / scores[0] if len(scores) else scores
+
+
+def hybrid_search(catalog, text, vector_indices, vector_scores, k, rows=None, weight=None,
+                  candidates=HYBRID_CANDIDATES):
+    """Fuse one query's vector results with BM25 and return the top k: (indices, scores).
+
+    vector_indices/vector_scores are the vector backend's best rows for the query, ideally
+    max(k, candidates) of them. They are merged with the top lexical candidates, and each row
+    scores (1 - weight) * cosine + weight * BM25 / best BM25. Rows that only the lexical side
+    found are scored at the lowest vector score returned, an upper bound of their true similarity.
+    When no row shares a term with text the vector ranking is returned unchanged.
+    """
+    weight = HYBRID_LEXICAL_WEIGHT if weight is None else weight
+    vector_indices = np.asarray(vector_indices)
+    vector_scores = np.asarray(vector_scores, dtype=np.float64)
+    if weight <= 0 or not len(vector_indices):
+        return vector_indices[:k], vector_scores[:k]
+    lexical = load_lexical_index(catalog)
+    scores = lexical.scores(text)
+    lexical_indices, _ = lexical.top(scores, candidates, rows)
+    ids = np.union1d(vector_indices, lexical_indices)
+    best = scores[ids].max()
+    if best <= 0:
+        return vector_indices[:k], vector_scores[:k]
+    similarity = np.full(len(ids), vector_scores.min())
+    similarity[np.searchsorted(ids, vector_indices)] = vector_scores
+    fused = (1 - weight) * similarity + weight * scores[ids] / best
+    order = top_k(fused, k)
+    return ids[order], fused[order]
+
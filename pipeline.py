@@ -0,0 +1,447 @@
+import http_client
+from bs4 import BeautifulSoup
+import google.generativeai as genai
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout, as_completed, wait
+from catalog_index import load_catalog
+from vector_index import load_vector_index, search_chunks
+from filter_index import load_filter_index, parse_filters
+from duration_store import DurationStore, parse_duration
+from browser_pool import BrowserPool
+from embedding_cache import EmbeddingCache
+from deadline import Deadline
+from job_page import MAX_DESCRIPTION_CHARS, declared_charset, extract_job_description, read_limited
+from chunking import (CHUNKED_DESCRIPTION_MAX_CHARS, EMBEDDING_CHUNKING, chunk_weights, chunking_enabled,
+                      split_text)
+from job_page_cache import JobPageCache
+from result_cache import ResultCache, result_key
+from embedder import GEMINI_EMBED_TIMEOUT, get_embedder
+from lexical_index import HYBRID_CANDIDATES, HYBRID_LEXICAL_WEIGHT, hybrid_search, lexical_search
+
+GEMINI_API_KEY = None  # Set by the entry point (recommender.py or recommenderRender.py) via configure()
+JOB_PAGE_TIMEOUT = 10  # Seconds allowed for fetching a job posting
+STREAM_DURATION_TIMEOUT = 20  # Seconds a stream waits for background duration refreshes
+# Chunked embedding can use long postings in full, so job pages are extracted further when it is on
+JOB_DESCRIPTION_MAX_CHARS = CHUNKED_DESCRIPTION_MAX_CHARS if chunking_enabled() else MAX_DESCRIPTION_CHARS
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Headless browsers for the dynamic-page fallback, started once and reused across fetches
+browser_pool = BrowserPool()
+# Repeated job descriptions are answered from memory or the shared SQLite file, skipping the API
+embedding_cache = EmbeddingCache()
+# Job pages pasted repeatedly are served from memory and revalidated instead of re-downloaded
+job_page_cache = JobPageCache()
+# Finished recommendation lists for repeated queries, dropped when a new catalog version loads
+result_cache = ResultCache()
+
+def configure(api_key):
+    """Set the Gemini API key used for query embeddings. Called once per process by the entry point."""
+    global GEMINI_API_KEY
+    GEMINI_API_KEY = api_key
+    genai.configure(api_key=api_key)  # Configure the client once per process, not per call
+
+def catalog_embedder(catalog):
+    """The embedder that produced catalog; job descriptions must be embedded with the same one."""
+    return get_embedder(catalog.embedder, api_key=GEMINI_API_KEY)
+
+def get_embedding(text, embedder, deadline=None):
+    """Embed one text, served from the embedding cache when the embedder is remote.
+
+    Remote calls are bounded by GEMINI_EMBED_TIMEOUT and, under a deadline, by the remaining
+    budget without retries. Local embedders are cheaper than a cache lookup and run directly.
+    """
+    if not embedder.remote:
+        return embedder.embed(text)
+    deadline = deadline or Deadline()
+    return embedding_cache.get_or_compute(
+        text, embedder.name,
+        lambda t: embedder.embed(
+            t, timeout=deadline.timeout(GEMINI_EMBED_TIMEOUT), retry=deadline.expires_at is None
+        )
+    )
+
+def get_embeddings(texts, embedder, deadline=None):
+    """Embed several texts; with a remote embedder only cache misses are sent, in batches."""
+    if not embedder.remote:
+        return embedder.embed_many(texts)
+    deadline = deadline or Deadline()
+    return embedding_cache.get_or_compute_many(
+        texts, embedder.name,
+        lambda t: embedder.embed_many(
+            t, timeout=deadline.timeout(GEMINI_EMBED_TIMEOUT), retry=deadline.expires_at is None
+        )
+    )
+
+def embed_job_descriptions(descriptions, embedder, deadline=None):
+    """Embed job descriptions together; returns, per description, its [(chunk, embedding)] pairs.
+
+    With EMBEDDING_CHUNKING off each description is a single chunk. Otherwise long descriptions are
+    split into overlapping chunks (see chunking.py), and the chunks of every description are sent
+    in one batch, so a 10-chunk posting costs one round trip, like a single embedding. Chunks that
+    failed to embed are left out.
+    """
+    chunk_lists = [split_text(d) if chunking_enabled() else [d] for d in descriptions]
+    embeddings = iter(get_embeddings([chunk for chunks in chunk_lists for chunk in chunks], embedder, deadline))
+    return [[(chunk, emb) for chunk, emb in zip(chunks, embeddings) if emb] for chunks in chunk_lists]
+
+def search_embedded_chunks(catalog, embedded_chunks, top_n, rows=None):
+    """Score catalog rows against a chunked description with the configured aggregation."""
+    chunks, embeddings = zip(*embedded_chunks)
+    return search_chunks(load_vector_index(catalog), catalog.embeddings, list(embeddings), top_n, rows=rows,
+                         aggregate=EMBEDDING_CHUNKING, weights=chunk_weights(chunks))
+
+def rank_by_keywords(catalog, job_description, top_n, rows, deadline):
+    """BM25-only ranking for a job description that could not be embedded; marks the deadline degraded."""
+    deadline.degrade("embedding")
+    indices, scores = lexical_search(catalog, job_description, top_n, rows)
+    return [(catalog.record(idx), similarity) for idx, similarity in zip(indices, scores)]
+
+def scrape_job_description(url, deadline=None):
+    """Scrape a job description from a hiring link, served from the job page cache when possible.
+
+    Each URL is downloaded at most once per JOB_PAGE_TTL_SECONDS, then revalidated with its ETag /
+    Last-Modified validators; failures are remembered for JOB_PAGE_NEGATIVE_TTL_SECONDS.
+    """
+    deadline = deadline or Deadline()
+    description = job_page_cache.get(
+        url, lambda etag, last_modified: _fetch_job_page(url, deadline, etag, last_modified))
+    return description or "N/A"
+
+def _fetch_job_page(url, deadline, etag=None, last_modified=None):
+    """Conditionally fetch and extract a job page; returns (status, description, etag, last_modified).
+
+    The page is streamed into the extractor (see job_page.py), capped at JOB_PAGE_MAX_BYTES, and the
+    download stops as soon as enough description text has been read or the deadline runs out.
+    """
+    print(f"Attempting to scrape URL: {url}")
+    headers = dict(HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        with http_client.get(url, headers=headers, timeout=deadline.timeout(JOB_PAGE_TIMEOUT),
+                             retry=deadline.expires_at is None, stream=True) as response:
+            print(f"Response status: {response.status_code}")
+            validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            if response.status_code == 304:
+                print("Job page unchanged since it was cached.")
+                return (304, None) + validators
+            response.raise_for_status()
+            description = extract_job_description(read_limited(response), declared_charset(response),
+                                                  should_stop=deadline.expired, max_chars=JOB_DESCRIPTION_MAX_CHARS)
+    except Exception as e:
+        print(f"Error scraping job description from {url}: {e}")
+        # Running out of this request's deadline says nothing about the page itself
+        return (None if deadline.expired() else 0), None, None, None
+
+    if description:
+        print(f"Extracted description (first 100 chars): {description[:100]}...")
+    else:
+        print("No relevant description found in <p>, <div>, or <section> tags.")
+    # A page cut short by the deadline is used for this request but not cached
+    return (None if deadline.expired() else response.status_code, description) + validators
+
+def fetch_duration(url):
+    """Fetch duration from assessment URL using Selenium fallback."""
+    try:
+        # Initial attempt with requests
+        response = http_client.get(url, headers=HEADERS, timeout=10)
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.content, "html.parser")
+        else:
+            raise Exception(f"Non-200 status: {response.status_code}")
+
+        # Target the specific Assessment length section
+        duration_info = parse_duration(soup)
+        if duration_info != "N/A":
+            print(f"Debug: Found duration {duration_info} for {url}")
+
+        # Fallback to a pooled browser for dynamic content
+        if duration_info == "N/A":
+            page_source = browser_pool.page_source(url)
+            if page_source is None:
+                return "N/A"
+            soup = BeautifulSoup(page_source, "html.parser")
+
+            duration_info = parse_duration(soup)
+            if duration_info != "N/A":
+                print(f"Debug: Found duration {duration_info} via Selenium for {url}")
+            else:
+                print(f"Debug: No duration found in {url}")
+
+        return duration_info
+
+    except Exception as e:
+        print(f"Error fetching duration for {url}: {e}")
+        return "N/A"
+
+# Durations are served from memory; missing or stale URLs are re-fetched in the background
+duration_store = DurationStore(fetcher=fetch_duration)
+
+def _to_recommendation(row, duration, similarity):
+    """Shape a catalog row into the recommendation dict returned to callers."""
+    return {
+        "name": row["name"],
+        "url": row["url"],
+        "description": row["description"],
+        "duration": duration,
+        "test_type": row["test_type"],
+        "remote_support": row["remote_support"],
+        "adaptive_support": row["adaptive_support"],
+        "similarity": float(similarity)
+    }
+
+def filter_rows(catalog, filters):
+    """Catalog positions that pass parsed filters (None when unfiltered), using current store durations."""
+    if not filters:
+        return None
+    index = load_filter_index(catalog)
+    if ("min_duration" in filters or "max_duration" in filters) and index.durations_version != duration_store.version:
+        # Background refreshes change a few URLs at a time: update those rows, rebuild only when the
+        # store's change log no longer reaches back to the index's version
+        urls, version = duration_store.changed_since(index.durations_version)
+        if urls is None:
+            index.set_durations([duration_store.peek(row["url"], default=row["duration"])
+                                 for row in catalog.metadata], version)
+        else:
+            index.update_durations({i: duration_store.peek(url, default=catalog.metadata[i]["duration"])
+                                    for url in urls for i in index.positions.get(url, ())}, version)
+    return index.rows(filters)
+
+def rank_assessments(job_description=None, job_url=None, dataset_path="shl_assessments.csv", top_n=10,
+                     deadline=None, filters=None, catalog=None):
+    """Scrape (if needed), embed and score a job; returns [(row, similarity)] best first, or [] on failure.
+
+    filters (see filter_index.parse_filters) restrict scoring to the catalog rows that pass them.
+    catalog pins the catalog version to score against; by default the current one is loaded.
+    Vector scores are fused with BM25 keyword scores (see lexical_index.py). When the description
+    cannot be embedded, or the deadline runs out first, it is ranked by keywords alone.
+    """
+    deadline = deadline or Deadline()
+    try:
+        # Load the precompiled catalog index (built once, reused across requests)
+        catalog = load_catalog(dataset_path) if catalog is None else catalog
+        if len(catalog) == 0:
+            print("Error: Dataset is empty.")
+            return []
+        # Job descriptions are embedded by the embedder recorded in the catalog
+        embedder = catalog_embedder(catalog)
+
+        # Resolve metadata filters first so an empty selection skips the scrape and embedding
+        rows = filter_rows(catalog, parse_filters(filters))
+        if rows is not None and len(rows) == 0:
+            print("No assessments match the filters.")
+            return []
+
+        # Get job description
+        if job_url:
+            job_description = scrape_job_description(job_url, deadline)
+            if job_description == "N/A":
+                print("Failed to scrape job description. Please provide text input.")
+                return []
+        elif not job_description:
+            print("Error: No job description or URL provided.")
+            return []
+
+        # Generate embedding for job description
+        if deadline.expired():
+            print("Deadline exceeded before embedding the job description; ranking by keywords.")
+            return rank_by_keywords(catalog, job_description, top_n, rows, deadline)
+        # Extra vector candidates give keyword matches room to move up in the fused ranking
+        vector_k = max(top_n, HYBRID_CANDIDATES) if HYBRID_LEXICAL_WEIGHT > 0 else top_n
+        if chunking_enabled() and len(split_text(job_description)) > 1:
+            # Long descriptions are embedded as overlapping chunks and scored by max-sim or weighted mean
+            embedded_chunks = embed_job_descriptions([job_description], embedder, deadline)[0]
+            if not embedded_chunks:
+                print("Failed to generate embeddings for job description chunks; ranking by keywords.")
+                return rank_by_keywords(catalog, job_description, top_n, rows, deadline)
+            indices, scores = search_embedded_chunks(catalog, embedded_chunks, vector_k, rows)
+        else:
+            job_embedding = get_embedding(job_description, embedder, deadline)
+            if not job_embedding:
+                print("Failed to generate embedding for job description; ranking by keywords.")
+                return rank_by_keywords(catalog, job_description, top_n, rows, deadline)
+
+            # Score against the catalog with the configured vector index (exact brute force by default)
+            indices, scores = load_vector_index(catalog).search(job_embedding, vector_k, rows=rows)
+        indices, scores = hybrid_search(catalog, job_description, indices[0], scores[0], top_n, rows)
+        return [(catalog.record(idx), similarity) for idx, similarity in zip(indices, scores)]
+
+    except Exception as e:
+        print(f"Error in recommendation: {e}")
+        return []
+
+def enrich_durations(ranked, deadline):
+    """Durations for ranked rows and the set of URLs whose duration could not be refreshed in time.
+
+    Without a deadline this never blocks: stored durations are returned and refreshes run in the
+    background. Under a deadline, missing or stale durations are awaited for the remaining budget;
+    those still pending are served from the store or catalog and reported as degraded.
+    """
+    unresolved = set()
+    if deadline.expires_at is not None and duration_store.fetcher:
+        stale = {row["url"] for row, _ in ranked if not duration_store.is_fresh(row["url"])}
+        if stale and not deadline.expired():
+            futures = {duration_store.resolve(url): url for url in stale}
+            _, not_done = wait(futures, timeout=deadline.remaining())
+            unresolved = {futures[future] for future in not_done}
+        else:
+            unresolved = stale
+        if unresolved:
+            deadline.degrade("duration")
+    durations = [duration_store.get(row["url"], default=row["duration"]) for row, _ in ranked]
+    return durations, unresolved
+
+def recommend_assessments(job_description=None, job_url=None, dataset_path="shl_assessments.csv", top_n=10,
+                          deadline=None, filters=None, catalog=None):
+    """Recommend assessments based on job description or URL, with durations from the duration store.
+
+    deadline is an optional Deadline shared by every stage. Recommendations whose duration could
+    not be refreshed within it carry "degraded": ["duration"], and results ranked by keywords
+    alone carry "embedding". filters restrict which assessments are scored, e.g.
+    {"remote_support": True, "max_duration": 30, "test_type": ["Knowledge & Skills"]}.
+    """
+    deadline = deadline or Deadline()
+    ranked = rank_assessments(job_description, job_url, dataset_path, top_n, deadline, filters, catalog)
+    keywords_only = "embedding" in deadline.degraded
+    durations, unresolved = enrich_durations(ranked, deadline)
+    recommendations = []
+    for (row, similarity), duration in zip(ranked, durations):
+        recommendation = _to_recommendation(row, duration, similarity)
+        degraded = (["embedding"] if keywords_only else []) + (["duration"] if row["url"] in unresolved else [])
+        if degraded:
+            recommendation["degraded"] = degraded
+        recommendations.append(recommendation)
+    return recommendations
+
+def recommend_cached(job_description=None, job_url=None, dataset_path="shl_assessments.csv", top_n=10,
+                     deadline=None, filters=None, catalog=None):
+    """recommend_assessments behind the result cache; returns (recommendations, served_from_cache).
+
+    Only complete results are cached: empty lists and results with degraded fields are recomputed
+    on the next call, so a request that ran out of time never pins a partial answer.
+    """
+    catalog = load_catalog(dataset_path) if catalog is None else catalog
+    filters = parse_filters(filters)
+    version = catalog.version["version"]
+    key = result_key(job_description, job_url, top_n, filters, version)
+    recommendations = result_cache.get(key, version)
+    if recommendations is not None:
+        return recommendations, True
+    recommendations = recommend_assessments(job_description, job_url, dataset_path, top_n, deadline, filters, catalog)
+    if recommendations and not any(rec.get("degraded") for rec in recommendations):
+        result_cache.put(key, version, recommendations)
+    return recommendations, False
+
+def stream_recommendations(ranked, duration_timeout=STREAM_DURATION_TIMEOUT, deadline=None):
+    """Yield recommendation events for ranked [(row, similarity)] pairs as they become available.
+
+    Every ranked result is yielded first as ("result", rank, recommendation) using the stored
+    duration. Durations that are missing or stale are then refreshed in the background and yielded
+    as ("duration", rank, url, duration) in completion order, so no result waits on the slowest
+    detail page. A final ("summary", info) event reports how many updates arrived before the timeout,
+    which is shortened to the remaining budget of deadline.
+    """
+    deadline = deadline or Deadline()
+    start = time.perf_counter()
+    pending = {}
+    for rank, (row, similarity) in enumerate(ranked, start=1):
+        url = row["url"]
+        if duration_store.fetcher and not duration_store.is_fresh(url):
+            pending.setdefault(duration_store.resolve(url), []).append((rank, url))
+        duration = duration_store.get(url, default=row["duration"])
+        yield ("result", rank, _to_recommendation(row, duration, similarity))
+
+    updated = 0
+    try:
+        for future in as_completed(pending, timeout=deadline.timeout(duration_timeout)):
+            duration = future.result()
+            if duration == "N/A":
+                continue
+            for rank, url in pending[future]:
+                updated += 1
+                yield ("duration", rank, url, duration)
+        timed_out = False
+    except FuturesTimeout:
+        timed_out = True
+
+    yield ("summary", {
+        "results": len(ranked),
+        "duration_refreshes": len(pending),
+        "duration_updates": updated,
+        "timed_out": timed_out,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "degraded": list(deadline.degraded),
+    })
+
+def rank_batch(descriptions, catalog, top_n=10, embedder=None):
+    """Rank many job descriptions at once; returns [(row, similarity)] per description, in order.
+
+    All descriptions are embedded in one batch (with embedder, by default the catalog's), and the
+    single-vector ones are scored together in one matrix product. None entries, and descriptions
+    that match nothing, get [].
+    """
+    ranked = [[] for _ in descriptions]
+    pending = [i for i, description in enumerate(descriptions) if description]
+    if not pending:
+        print("Error: No usable job descriptions in batch.")
+        return ranked
+
+    # One embedding call for the whole batch, including every chunk of long descriptions
+    chunked = embed_job_descriptions([descriptions[i] for i in pending], embedder or catalog_embedder(catalog))
+    embedded = [(i, chunks) for i, chunks in zip(pending, chunked) if chunks]
+    if len(embedded) < len(pending):
+        print(f"Failed to embed {len(pending) - len(embedded)} batch jobs; ranking them by keywords.")
+
+    # Single-vector jobs are scored together in one matrix product; chunked jobs one at a time
+    vector_k = max(top_n, HYBRID_CANDIDATES) if HYBRID_LEXICAL_WEIGHT > 0 else top_n
+    single = [(i, chunks[0][1]) for i, chunks in embedded if len(chunks) == 1]
+    vector_ranked = []
+    if single:
+        indices, scores = load_vector_index(catalog).search([emb for _, emb in single], vector_k)
+        vector_ranked.extend(zip([i for i, _ in single], indices, scores))
+    for i, chunks in embedded:
+        if len(chunks) > 1:
+            indices, scores = search_embedded_chunks(catalog, chunks, vector_k)
+            vector_ranked.append((i, indices[0], scores[0]))
+    scored = [(i, *hybrid_search(catalog, descriptions[i], indices, scores, top_n))
+              for i, indices, scores in vector_ranked]
+    embedded_jobs = {i for i, _ in embedded}
+    scored.extend((i, *lexical_search(catalog, descriptions[i], top_n)) for i in pending if i not in embedded_jobs)
+    for job_idx, row_indices, row_scores in scored:
+        ranked[job_idx] = [(catalog.record(idx), similarity) for idx, similarity in zip(row_indices, row_scores)]
+    return ranked
+
+def recommend_batch(jobs, dataset_path="shl_assessments.csv", top_n=10, catalog=None):
+    """Recommend assessments for many jobs at once, scoring all queries in one matrix product.
+
+    jobs is a list of dicts with either "job_description" or "job_url"; the result is a list of
+    recommendation lists in the same order, with [] for jobs that could not be processed.
+    """
+    results = [[] for _ in jobs]
+    try:
+        catalog = load_catalog(dataset_path) if catalog is None else catalog
+        if len(catalog) == 0:
+            print("Error: Dataset is empty.")
+            return results
+
+        descriptions = []
+        for job in jobs:
+            description = job.get("job_description")
+            if job.get("job_url"):
+                description = scrape_job_description(job["job_url"])
+            descriptions.append(description if description and description != "N/A" else None)
+
+        for job_idx, ranked in enumerate(rank_batch(descriptions, catalog, top_n)):
+            for row, similarity in ranked:
+                duration = duration_store.get(row["url"], default=row["duration"])
+                results[job_idx].append(_to_recommendation(row, duration, similarity))
+
+        return results
+
+    except Exception as e:
+        print(f"Error in batch recommendation: {e}")
+        return results
@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that calls the same quota-limited API.
+
+    rate tokens are added per second up to capacity; acquire(n) blocks until n tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, capacity=None):
+        return cls(requests_per_minute / 60.0, capacity)
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available, then take them. Returns the seconds spent waiting."""
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from filter_index import filters_key
+from job_page_cache import normalize_url
+
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+
+
+def result_key(job_description, job_url, top_n, filters, catalog_version):
+    """Hash of the normalized job URL (or whitespace-normalized description), top_n, parsed filters
+    and catalog version."""
+    job = ("url", normalize_url(job_url)) if job_url else ("text", " ".join(job_description.split()))
+    payload = json.dumps([job, top_n, filters_key(filters), catalog_version], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """In-process LRU of finished recommendation lists with a TTL, scoped to one catalog version.
+
+    Entries are only valid for the catalog version they were computed against: the first put for
+    a new version drops everything cached for the previous one, and lookups for any other version
+    miss. Values are lists of recommendation dicts; get returns shallow copies of them.
+    """
+
+    def __init__(self, ttl=RESULT_CACHE_TTL_SECONDS, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key, catalog_version):
+        """Cached recommendations for key, or None on a miss, an expired entry or another version."""
+        with self._lock:
+            entry = self._entries.get(key) if catalog_version == self._version else None
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return [dict(rec) for rec in entry[1]]
+
+    def put(self, key, catalog_version, recommendations):
+        with self._lock:
+            if catalog_version != self._version:
+                # A new catalog version was loaded: results computed against the old one are stale
+                if self._entries:
+                    self._counters["invalidations"] += 1
+                self._entries.clear()
+                self._version = catalog_version
+            self._entries[key] = (time.monotonic(), [dict(rec) for rec in recommendations])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Hit, miss and invalidation counters, the cached catalog version and the number of entries."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["catalog_version"] = self._version
+        return stats
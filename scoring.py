@@ -0,0 +1,78 @@
+import numpy as np
+
+
+def normalize_rows(vectors):
+    """Return a float32 copy of vectors with every row scaled to unit length (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores per row, best first, using argpartition instead of a full sort."""
+    scores = np.asarray(scores)
+    squeeze = scores.ndim == 1
+    if squeeze:
+        scores = scores[np.newaxis, :]
+    n = scores.shape[1]
+    k = max(0, min(k, n))
+    if k == 0:
+        indices = np.empty((scores.shape[0], 0), dtype=np.intp)
+    else:
+        if k < n:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(n), (scores.shape[0], 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        indices = np.take_along_axis(candidates, order, axis=1)
+    return indices[0] if squeeze else indices
+
+
+def search(matrix, queries, k):
+    """Cosine top-k of queries against a pre-normalized matrix.
+
+    matrix is (n_items, dim) with unit rows; queries is one vector or a (n_queries, dim) batch,
+    scored together in a single matrix product. Returns (indices, scores), each (n_queries, k).
+    """
+    queries = normalize_rows(queries)
+    similarities = queries @ np.asarray(matrix).T
+    indices = top_k(similarities, k)
+    return indices, np.take_along_axis(similarities, indices, axis=1)
+
+
+def quantize_rows(matrix):
+    """Symmetric per-row int8 quantization: returns (int8 matrix, float32 scales) with row ~= q * scale."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127 if len(matrix) else np.zeros(0, dtype=np.float32)
+    safe = np.where(scales == 0, 1.0, scales).astype(np.float32)
+    quantized = np.clip(np.rint(matrix / safe[:, np.newaxis]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def quantized_scores(quantized, scales, queries, chunk_rows=128):
+    """Approximate similarities of unit queries against an int8 matrix.
+
+    numpy has no int8 matrix product, so blocks of chunk_rows rows are converted into one small
+    reusable float32 buffer that stays in the CPU cache while it is scored. No float32 copy of the
+    matrix (or of a large slice of it) is ever made, and the scales are applied once at the end.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    scores = np.empty((len(queries), len(quantized)), dtype=np.float32)
+    buffer = np.empty((min(chunk_rows, len(quantized)), quantized.shape[1]), dtype=np.float32)
+    for start in range(0, len(quantized), chunk_rows):
+        block = buffer[:len(quantized[start:start + chunk_rows])]
+        block[...] = quantized[start:start + len(block)]
+        np.matmul(queries, block.T, out=scores[:, start:start + len(block)])
+    scores *= scales
+    return scores
+
+
+def max_sim_scores(matrix, queries):
+    """Max-sim score per matrix row for a multi-vector query: its best similarity to any query row."""
+    # matrix @ queries.T is the faster product layout; the reduction runs over its contiguous transpose
+    similarities = np.asarray(matrix) @ np.asarray(queries, dtype=np.float32).T
+    return np.ascontiguousarray(similarities.T).max(axis=0)
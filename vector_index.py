@@ -0,0 +1,342 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from scoring import max_sim_scores, normalize_rows, quantized_scores, search, top_k
+
+# Search backend used by the recommenders: "exact" (brute force, default), "int8" (quantized
+# candidates with exact re-rank) or "ivf" (approximate)
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX", "exact")
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))  # Lists scanned per query: higher is more accurate, slower
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "100"))  # int8 candidates re-scored in float32
+
+IVF_DIR = "ivf"  # Subdirectory of the catalog index
+IVF_CENTROIDS_FILE = "centroids.npy"
+IVF_VECTORS_FILE = "vectors.npy"
+IVF_IDS_FILE = "ids.npy"
+IVF_OFFSETS_FILE = "offsets.npy"
+IVF_META_FILE = "ivf.json"
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64  # Training rows sampled per list; the rest are only assigned
+ASSIGN_CHUNK_ROWS = 65536
+
+
+class ExactIndex:
+    """Brute-force cosine search over every catalog row; the default backend and the accuracy reference."""
+
+    backend = "exact"
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def search(self, queries, k, rows=None):
+        """Cosine top-k over every row, or only over the catalog positions in rows."""
+        if rows is None:
+            return search(self.matrix, queries, k)
+        # Score only the rows that passed the filter, then map positions back to catalog rows
+        indices, scores = search(self.matrix[rows], queries, k)
+        return rows[indices], scores
+
+
+class QuantizedIndex:
+    """Candidate generation on the int8 copy of the catalog, then an exact float32 re-rank.
+
+    Only the int8 matrix (a quarter of the float32 size) and its per-row scales are scanned per
+    query. When the float32 matrix is memory-mapped, the rerank candidates are read from its file
+    with pread rather than through the mapping: a page fault on the mapping also maps the pages the
+    kernel reads ahead, which soon maps most of the float32 file into every worker.
+    """
+
+    backend = "int8"
+
+    def __init__(self, quantized, scales, matrix, rerank=RERANK_CANDIDATES):
+        self.quantized = quantized
+        self.scales = scales
+        self.matrix = matrix
+        self.rerank = rerank
+        self._file = None
+        if isinstance(matrix, np.memmap) and matrix.filename and matrix.flags.c_contiguous:
+            self._file = open(matrix.filename, "rb")
+            self._row_bytes = matrix.shape[1] * matrix.itemsize
+
+    def __len__(self):
+        return len(self.quantized)
+
+    def rows(self, ids):
+        """float32 rows ids (sorted) of the full-precision matrix."""
+        if self._file is None:
+            return np.asarray(self.matrix[ids], dtype=np.float32)
+        fd, offset, size = self._file.fileno(), self.matrix.offset, self._row_bytes
+        data = b"".join(os.pread(fd, size, offset + int(i) * size) for i in ids)
+        return np.frombuffer(data, dtype=self.matrix.dtype).reshape(len(ids), -1).astype(np.float32, copy=False)
+
+    def search(self, queries, k, rows=None):
+        """Top-k with the same (indices, scores) shape as scoring.search; rows restricts the scan."""
+        queries = normalize_rows(queries)
+        if rows is None:
+            approximate = quantized_scores(self.quantized, self.scales, queries)
+        else:
+            approximate = quantized_scores(self.quantized[rows], self.scales[rows], queries)
+        n = approximate.shape[1]
+        k = max(0, min(k, n))
+        candidates = top_k(approximate, max(k, min(self.rerank, n)))
+        if rows is not None:
+            candidates = rows[candidates]
+
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        for qi, query in enumerate(queries):
+            # Sorted positions read the memory-mapped float32 rows in file order
+            ids = np.sort(candidates[qi])
+            exact = self.rows(ids) @ query
+            best = top_k(exact, k)
+            indices[qi] = ids[best]
+            scores[qi] = exact[best]
+        return indices, scores
+
+
+def search_chunks(index, matrix, chunk_queries, k, rows=None, aggregate="max", weights=None,
+                  candidates=RERANK_CANDIDATES):
+    """Top-k rows for one multi-vector query, scoring each row by aggregating its chunk similarities.
+
+    "max" (max-sim) scores a row by its best chunk. With exact search every row is scored in one
+    chunks x rows product; other backends collect the top candidates of every chunk and compute
+    max-sim exactly over their union. "mean" is the weighted mean chunk similarity (weights sum to
+    1, uniform when None), which equals the similarity to the weighted mean of the chunk vectors, so
+    it is a single-vector search on any backend. Returns (indices, scores) shaped (1, k).
+    """
+    queries = normalize_rows(chunk_queries)
+    if aggregate == "mean":
+        if weights is None:
+            weights = np.full(len(queries), 1 / len(queries))
+        query = np.asarray(weights, dtype=np.float32) @ queries
+        indices, scores = index.search(query, k, rows=rows)
+        # search() normalizes the query; scale back to the mean of the chunk similarities
+        return indices, scores * np.linalg.norm(query)
+    if aggregate != "max":
+        raise ValueError(f"Unknown chunk aggregation: {aggregate}")
+
+    if index.backend == "exact":
+        ids = rows
+    else:
+        found, _ = index.search(queries, max(k, candidates), rows=rows)
+        ids = np.unique(found)
+    scores = max_sim_scores(matrix if ids is None else matrix[ids], queries)
+    best = top_k(scores, k)
+    indices = best if ids is None else ids[best]
+    return indices[np.newaxis], scores[best][np.newaxis]
+
+
+def default_list_count(n_rows):
+    """Number of IVF lists for a catalog of n_rows: about sqrt(n_rows)."""
+    return max(1, int(round(np.sqrt(n_rows))))
+
+
+def _assign(matrix, centroids):
+    """Closest centroid for every row, computed in chunks to bound the temporary score matrix."""
+    assignment = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(matrix[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def train_centroids(matrix, n_lists, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means on a sample of the unit-normalized rows; returns (n_lists, dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    n_rows = len(matrix)
+    sample_size = min(n_rows, n_lists * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(matrix[np.sort(rng.choice(n_rows, sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(sample, centroids)
+        counts = np.bincount(assignment, minlength=n_lists)
+        order = np.argsort(assignment, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[filled]
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        # Lists that lost every member are reseeded from random sample rows
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Approximate inverted-file index over a unit-normalized embedding matrix.
+
+    Rows are clustered around spherical k-means centroids and stored contiguously per list. A
+    query scores the centroids, scans only the nprobe closest lists and takes the exact top k of
+    those candidates, so nprobe is the accuracy/speed knob (nprobe == n_lists is exhaustive).
+    """
+
+    backend = "ivf"
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe=IVF_NPROBE, meta=None):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, iterations=KMEANS_ITERATIONS, seed=0, nprobe=IVF_NPROBE):
+        """Cluster matrix rows into n_lists inverted lists (default about sqrt(rows))."""
+        start = time.perf_counter()
+        n_lists = min(n_lists or default_list_count(len(matrix)), len(matrix))
+        centroids = train_centroids(matrix, n_lists, iterations, seed)
+        assignment = _assign(matrix, centroids)
+        ids = np.argsort(assignment, kind="stable").astype(np.int64)
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=n_lists)))).astype(np.int64)
+        vectors = np.ascontiguousarray(np.asarray(matrix)[ids], dtype=np.float32)
+        meta = {"rows": len(ids), "dim": int(vectors.shape[1]), "lists": n_lists,
+                "build_seconds": round(time.perf_counter() - start, 2)}
+        return cls(centroids, vectors, ids, offsets, nprobe, meta)
+
+    def save(self, path, catalog_version=None):
+        """Write the index to path; the metadata file is written last and records the catalog version."""
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, IVF_META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        np.save(os.path.join(path, IVF_CENTROIDS_FILE), self.centroids)
+        np.save(os.path.join(path, IVF_VECTORS_FILE), self.vectors)
+        np.save(os.path.join(path, IVF_IDS_FILE), self.ids)
+        np.save(os.path.join(path, IVF_OFFSETS_FILE), self.offsets)
+        self.meta["catalog_version"] = catalog_version
+        self.meta["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    @classmethod
+    def load(cls, path, nprobe=IVF_NPROBE):
+        """Open a saved index with the grouped vectors and ids memory-mapped read-only."""
+        try:
+            with open(os.path.join(path, IVF_META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            raise FileNotFoundError(f"No IVF index found in {path}")
+        return cls(
+            np.load(os.path.join(path, IVF_CENTROIDS_FILE)),
+            np.load(os.path.join(path, IVF_VECTORS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, IVF_IDS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, IVF_OFFSETS_FILE)),
+            nprobe,
+            meta,
+        )
+
+    def search(self, queries, k, nprobe=None, rows=None):
+        """Approximate cosine top-k with the same (indices, scores) shape as scoring.search.
+
+        rows restricts the search to those catalog positions; lists are then sized by their
+        allowed rows, and only allowed rows are scored.
+        """
+        queries = normalize_rows(queries)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        allowed = None
+        if rows is None:
+            sizes = np.diff(self.offsets)
+            k = max(0, min(k, len(self.ids)))
+        else:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            mask[rows] = True
+            allowed = mask[self.ids]  # Filter mask in stored (list-grouped) order
+            counted = np.concatenate(([0], np.cumsum(allowed)))
+            sizes = counted[self.offsets[1:]] - counted[self.offsets[:-1]]
+            k = max(0, min(k, len(rows)))
+        probe_order = np.argsort(-(queries @ self.centroids.T), axis=1)
+
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        for qi, query in enumerate(queries):
+            lists = probe_order[qi]
+            # Probe nprobe lists, plus as many more as it takes to have at least k candidates
+            enough = int(np.searchsorted(np.cumsum(sizes[lists]), k)) + 1
+            candidate_scores, candidate_ids = [], []
+            for l in lists[:max(nprobe, enough)]:
+                span = slice(self.offsets[l], self.offsets[l + 1])
+                if allowed is not None:
+                    span = np.flatnonzero(allowed[span]) + self.offsets[l]
+                candidate_scores.append(self.vectors[span] @ query)
+                candidate_ids.append(self.ids[span])
+            candidate_scores = np.concatenate(candidate_scores)
+            candidate_ids = np.concatenate(candidate_ids)
+            best = top_k(candidate_scores, k)
+            indices[qi] = candidate_ids[best]
+            scores[qi] = candidate_scores[best]
+        return indices, scores
+
+
+def ivf_dir(catalog):
+    return os.path.join(catalog.index_dir, IVF_DIR)
+
+
+def build_ivf(catalog, n_lists=None, nprobe=IVF_NPROBE):
+    """Build and save the IVF index for a loaded catalog (an offline step, like build_index)."""
+    index = IVFIndex.build(catalog.embeddings, n_lists=n_lists, nprobe=nprobe)
+    index.save(ivf_dir(catalog), catalog.version["version"])
+    print(f"✅ Built IVF index with {index.n_lists} lists over {len(index)} rows in {ivf_dir(catalog)} "
+          f"({index.meta['build_seconds']:.2f}s)")
+    return index
+
+
+def load_vector_index(catalog, backend=None, nprobe=None):
+    """Search backend for a catalog: exact brute force by default, int8 with re-rank, or its IVF index.
+
+    Falls back to exact search (with a warning) when the IVF index is missing or was built from a
+    different catalog version.
+    """
+    backend = backend or VECTOR_INDEX_BACKEND
+    if backend == "exact":
+        return ExactIndex(catalog.embeddings)
+    if backend == "int8":
+        if catalog.quantized is None:
+            print("Catalog index has no int8 copy; using exact search. Rebuild it with: python catalog_index.py")
+            return ExactIndex(catalog.embeddings)
+        return QuantizedIndex(catalog.quantized, catalog.scales, catalog.embeddings)
+    if backend != "ivf":
+        raise ValueError(f"Unknown vector index backend: {backend}")
+
+    nprobe = nprobe or IVF_NPROBE
+
+    def load():
+        try:
+            index = IVFIndex.load(ivf_dir(catalog), nprobe)
+            if index.meta.get("catalog_version") == catalog.version["version"]:
+                return index
+            print(f"IVF index in {ivf_dir(catalog)} is stale; using exact search. Rebuild with: python vector_index.py")
+        except FileNotFoundError as e:
+            print(f"{e}; using exact search. Build it with: python vector_index.py")
+        return ExactIndex(catalog.embeddings)
+
+    return catalog.derived(("ivf", nprobe), load)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from catalog_index import DEFAULT_DATASET_PATH, load_catalog
+
+    parser = argparse.ArgumentParser(description="Build the approximate (IVF) vector index for a catalog.")
+    parser.add_argument("dataset_path", nargs="?", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--lists", type=int, default=None, help="Number of inverted lists (default: sqrt(rows))")
+    args = parser.parse_args()
+    build_ivf(load_catalog(args.dataset_path, args.index_dir), n_lists=args.lists)